@@ -15,7 +15,7 @@ from datetime import datetime
 from gpiozero import Button, PWMOutputDevice
 import RPi.GPIO as GPIO
 import threading
-from picamera2 import Picamera2
+from picamera2 import Picamera2, MappedArray
 from libcamera import Transform
 from PIL import Image, ImageDraw
 from st7789_display import ST7789Display
@@ -362,6 +362,10 @@ class CameraViewfinder:
         self.min_gain = 1.0
         self.max_gain = 16.0  # Allow up to ISO 1600 equivalent
 
+        # AE metering region: central 50% crop, sampled every 4th pixel
+        self._ae_roi = (slice(PREVIEW_HEIGHT // 4, 3 * PREVIEW_HEIGHT // 4, 4),
+                        slice(PREVIEW_WIDTH // 4, 3 * PREVIEW_WIDTH // 4, 4))
+
         print("Camera ready!")
 
         # Start LED pulsing to indicate running
@@ -391,6 +395,11 @@ class CameraViewfinder:
         self.current_shutter_speed = 0
         self.current_focus_distance = 0
         self.capturing = False  # Flag to pause main loop during photo capture
+        self._settle_frames = 0  # Frames to drain while new controls propagate
+
+        # Preview frame buffers, reused every frame instead of allocating new arrays
+        self._frame_bufs = [np.empty((PREVIEW_HEIGHT, PREVIEW_WIDTH, 3), dtype=np.uint8) for _ in range(2)]
+        self._fb_idx = 0
     
     def count_existing_photos(self):
         """Count existing photos in storage directory"""
@@ -421,6 +430,29 @@ class CameraViewfinder:
             print(f"Error calculating remaining photos: {e}")
             return 999  # Default fallback value
     
+    def capture_preview_frame(self):
+        """
+        Copy the next preview frame into one of the reusable frame buffers
+
+        Returns:
+            numpy array (76, 114, 3) - valid until the buffer is reused two frames later
+        """
+        request = self.camera.capture_request()
+        try:
+            with MappedArray(request, "main") as mapped:
+                frame = mapped.array
+                buf = self._frame_bufs[self._fb_idx]
+                if buf.shape != frame.shape:
+                    # Camera picked a different size/stride - reallocate once
+                    buf = np.empty(frame.shape, dtype=np.uint8)
+                    self._frame_bufs[self._fb_idx] = buf
+                np.copyto(buf, frame)
+        finally:
+            request.release()
+
+        self._fb_idx ^= 1
+        return buf
+
     def create_viewfinder_frame(self, camera_array):
         """
         Add UI overlay to camera preview
@@ -1249,8 +1281,14 @@ class CameraViewfinder:
                 # Skip frame capture if we're currently taking a photo
                 if not self.capturing:
                     try:
+                        # While new controls settle, drain frames without overlay/display
+                        if self._settle_frames > 0:
+                            self._settle_frames -= 1
+                            self.camera.capture_request().release()
+                            continue
+
                         # Capture camera frame (metadata included with the frame)
-                        camera_array = self.camera.capture_array()
+                        camera_array = self.capture_preview_frame()
 
                         # Get metadata only every 5 frames to reduce overhead
                         if self.frame_count % 5 == 0:
@@ -1270,8 +1308,8 @@ class CameraViewfinder:
 
                             # Manual exposure control - adjust gain to maintain brightness
                             if self.manual_exposure and not self.focus_locked:
-                                # Calculate mean brightness of the image (0-1 scale)
-                                mean_brightness = np.mean(camera_array) / 255.0
+                                # Center-weighted mean brightness (0-1 scale) on a subsampled ROI
+                                mean_brightness = float(camera_array[self._ae_roi].mean()) / 255.0
 
                                 # Adjust gain based on brightness difference
                                 brightness_error = self.target_brightness - mean_brightness
@@ -1290,6 +1328,9 @@ class CameraViewfinder:
                                         "AnalogueGain": float(self.current_gain)
                                     })
 
+                                    # Next few frames still use the old gain - don't draw them
+                                    self._settle_frames = 3
+
                         # Add UI overlay (creates 284x76 image)
                         display_frame = self.create_viewfinder_frame(camera_array)
 
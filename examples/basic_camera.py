@@ -4,18 +4,28 @@ Capture raw images directly works but with some delays
 is this working?
 """
 
-from flask import Flask, render_template_string, jsonify
-from picamera2 import Picamera2
+from flask import Flask, jsonify
+from flask_compress import Compress
+from waitress import serve
+from picamera2 import Picamera2, MappedArray
 from libcamera import Transform
+import logging
 import time
 import os
+import re
 import threading
-import queue
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import psutil
 from datetime import datetime
 
 app = Flask(__name__)
+# gzip the ~5KB page; the small JSON polls stay below Flask-Compress' 500-byte minimum
+Compress(app)
+
+# Per-capture diagnostics - set to DEBUG to trace the capture path
+logger = logging.getLogger(__name__)
 
 os.makedirs("photos/jpg", exist_ok=True)
 os.makedirs("photos/raw", exist_ok=True)
@@ -24,77 +34,174 @@ os.makedirs("photos/processed", exist_ok=True)
 
 # Global variables
 picam2 = None
+raw_config = None  # Raw stream config, needed to serialize DNGs off the request
 camera_lock = threading.Lock()
 
 # Background processing queue
-raw_queue = queue.Queue(maxsize=10)  # Limit queue size for Pi Zero 2
+RAW_QUEUE_MAX = 4  # Each in-flight DNG is ~18MB - keep Pi Zero 2 out of OOM
+# Single producer (capture, under camera_lock) / single consumer (writer):
+# deque append/popleft are atomic, the Event only wakes the writer
+raw_deque = collections.deque()
+raw_evt = threading.Event()
+# Reusable raw buffers, one per in-flight DNG - allocated on first use, then recycled
+free_raw_bufs = collections.deque([None] * RAW_QUEUE_MAX)
 processing_active = True
+active_bg_lock = threading.Lock()
+active_bg = 0  # DNGs the background writer is currently flushing
+
+# Optional per-shot post-processing (thumbnails, LUT previews, ...). Set to a
+# module-level function taking the DNG path; it runs in a separate process so
+# NumPy-heavy work never competes with capture for the GIL.
+POSTPROCESS_DNG = None
+postprocess_executor = None
+
+# Photo numbering - scanned once in init_camera, then maintained in-process
+photo_counter_lock = threading.Lock()
+next_photo_num = 1
+photo_total = 0
+
+PHOTO_NAME_RE = re.compile(r"photo(\d+)\.dng")
+
+def scan_photo_numbers():
+    """Get next photo number and photo count by checking existing files"""
+    highest = 0
+    count = 0
+    with os.scandir("photos/dng") as entries:
+        for entry in entries:
+            if not entry.name.endswith(".dng"):
+                continue
+            count += 1
+            match = PHOTO_NAME_RE.fullmatch(entry.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+    return highest + 1, count
 
 def get_next_photo_number():
-    """Get next photo number by checking existing files"""
-    dng_files = [f for f in os.listdir("photos/dng") if f.startswith("photo") and f.endswith(".dng")]
-    if not dng_files:
-        return 1
-    
-    numbers = []
-    for f in dng_files:
-        try:
-            num = int(f[5:8])  # Extract number from "photoXXX.jpg"
-            numbers.append(num)
-        except:
-            continue
-    
-    return max(numbers) + 1 if numbers else 1
+    """Reserve the next photo number"""
+    global next_photo_num
+    with photo_counter_lock:
+        num = next_photo_num
+        next_photo_num += 1
+    return num
 
 def get_photo_count():
     """Get current photo count"""
-    dng_files = [f for f in os.listdir("photos/dng") if f.endswith(".dng")]
-    return len(dng_files)
+    return photo_total
+
+def record_photo():
+    """Count a successfully captured photo"""
+    global photo_total
+    with photo_counter_lock:
+        photo_total += 1
+
+def flush_to_sd(path):
+    """Push a DNG written in place out to the card and drop it from the page cache"""
+    # The DNG serializer emits the file as one large buffered write; keep it that
+    # way (no O_SYNC/O_DSYNC) and sync once here so the SD card sees big
+    # sequential writes instead of many small synchronous ones
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def _log_postprocess_result(fut, dest):
+    """Report a failed POSTPROCESS_DNG run - the worker process can't log to us itself"""
+    if fut.cancelled():
+        return
+    e = fut.exception()
+    if e is not None:
+        logger.error("Post-processing failed for %s: %s", dest, e)
+
+def background_dng_processor():
+    """Drain raw_deque, serializing each captured raw buffer to a DNG on the SD card"""
+    # Keep DNG writes off the capture core and below Flask/libcamera
+    try:
+        os.sched_setaffinity(0, {1})
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+    global active_bg
+    while processing_active:
+        raw_evt.wait()
+        raw_evt.clear()
+        while raw_deque:
+            raw_buf, metadata, dest = raw_deque.popleft()
+            with active_bg_lock:
+                active_bg += 1
+            try:
+                # Same serializer CompletedRequest.save_dng() uses, minus the request
+                picam2.helpers.save_dng(raw_buf, metadata, raw_config, dest)
+                flush_to_sd(dest)
+                logger.debug("DNG written to %s", dest)
+                if postprocess_executor:
+                    fut = postprocess_executor.submit(POSTPROCESS_DNG, dest)
+                    fut.add_done_callback(lambda f, dest=dest: _log_postprocess_result(f, dest))
+            except Exception as e:
+                logger.error("Failed to write %s: %s", dest, e)
+            finally:
+                free_raw_bufs.append(raw_buf)
+                with active_bg_lock:
+                    active_bg -= 1
 
 def ultra_fast_dng_capture():
-    print("⚡ Ultra-fast DNG capture using raw stream")
+    logger.debug("Ultra-fast DNG capture using raw stream")
 
     photo_num = get_next_photo_number()
     dng_file = f"photos/dng/photo{photo_num:03d}.dng"
-    os.makedirs(os.path.dirname(dng_file), exist_ok=True)
 
-    print(f"[DEBUG] Next photo number: {photo_num}")
-    print(f"[DEBUG] Target DNG file: {dng_file}")
+    logger.debug("Next photo number: %d, target DNG file: %s", photo_num, dng_file)
 
     start_time = time.time()
     
     try:
         r = picam2.capture_request()
         if r is None:
-            print("[ERROR] capture_request() returned None")
+            logger.error("capture_request() returned None")
             return {'success': False, 'error': "No capture request"}
         
-        print("[DEBUG] Capture request acquired")
-
-        # Save to fast tmpfs first
-        tmp = f"/dev/shm/photo{photo_num:03d}.dng"
-        r.save_dng(tmp)
-        r.release()
-        print(f"[DEBUG] Temp DNG saved to {tmp}")
-
-        # Write out in a background thread
-        with open(tmp, "rb") as f:
-            data = f.read()
-
-        def writer_thread_func(data, dest):
-            with open(dest, "wb") as out:
-                out.write(data)
-            print(f"[DEBUG] File flushed to {dest}")
-
-        th = threading.Thread(target=writer_thread_func, args=(data, dng_file))
-        th.daemon = True
-        th.start()
+        logger.debug("Capture request acquired")
+
+        if not free_raw_bufs:
+            # Writer is backed up - staging would only pile more DNGs into RAM,
+            # so write straight to the card in one pass. The request is held for
+            # the whole write anyway, so serialize from the mapped libcamera
+            # buffer instead of letting save_dng() copy it out first.
+            try:
+                with MappedArray(r, "raw", reshape=False) as mapped:
+                    picam2.helpers.save_dng(mapped.array, r.get_metadata(), raw_config, dng_file)
+            finally:
+                r.release()
+            flush_to_sd(dng_file)
+            logger.debug("Backlog full, DNG written directly to %s", dng_file)
+        else:
+            # Copy the raw pixels into a pooled buffer and free the request -
+            # DNG serialization (~50-150ms) happens on the background writer, not here
+            raw_buf = free_raw_bufs.popleft()
+            try:
+                with MappedArray(r, "raw", reshape=False) as mapped:
+                    if raw_buf is None or raw_buf.shape != mapped.array.shape:
+                        raw_buf = np.empty_like(mapped.array)
+                    np.copyto(raw_buf, mapped.array)
+            except Exception:
+                free_raw_bufs.append(raw_buf)
+                r.release()
+                raise
+            metadata = r.get_metadata()
+            r.release()
+
+            raw_deque.append((raw_buf, metadata, dng_file))
+            raw_evt.set()
+            logger.debug("Raw buffer queued for DNG writer")
 
     except Exception as e:
-        print(f"[ERROR] Exception during capture: {e}")
+        logger.error("Exception during capture: %s", e)
         return {'success': False, 'error': str(e)}
     
     capture_time = time.time() - start_time
+    record_photo()
     
     return {
         'success': True,
@@ -106,8 +213,11 @@ def ultra_fast_dng_capture():
     
 def init_camera():
     """Initialize the Pi Camera for fast raw capture"""
-    global picam2, raw_config
+    global picam2, raw_config, next_photo_num, photo_total, postprocess_executor
     try:
+        next_photo_num, photo_total = scan_photo_numbers()
+        print(f"Existing DNGs: {photo_total}, next photo number: {next_photo_num}")
+
         picam2 = Picamera2()
         
         # Check sensor resolution
@@ -115,10 +225,31 @@ def init_camera():
         print(f"Sensor resolution: {sensor_res}")
         
         # CONFIG HERE
-        capture_config = picam2.create_still_configuration( raw={"size": (3760, 2120)}, display=None)
+        # queue=True keeps the latest completed request in hand so capture_request()
+        # returns without waiting for a frame; the second buffer keeps the sensor
+        # filling the next frame while that one is held. Only raw is saved, so the
+        # main stream is kept small to pay for the extra buffer in CMA.
+        capture_config = picam2.create_still_configuration(
+            main={"size": (640, 480)},
+            raw={"size": (3760, 2120)},
+            display=None,
+            buffer_count=2,
+            queue=True
+        )
         
         picam2.configure(capture_config)
+        raw_config = picam2.camera_config["raw"]
         picam2.start()
+
+        if POSTPROCESS_DNG is not None:
+            # spawn, not fork: don't clone libcamera's threads into the worker
+            postprocess_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+        # Single long-lived writer for all captures
+        writer = threading.Thread(target=background_dng_processor, name="background_dng_processor")
+        writer.daemon = True
+        writer.start()
         
         return True
     except Exception as e:
@@ -128,38 +259,34 @@ def init_camera():
 @app.route('/')
 def index():
     photo_count = get_photo_count()
-    return render_template_string(HTML_TEMPLATE, photo_count=photo_count)
+    return HTML_PRE + str(photo_count) + HTML_POST
 
 @app.route('/fast_capture', methods=['POST'])
 def fast_capture():
-    result = ultra_fast_dng_capture()
+    # Status polls run in parallel under waitress; only one capture at a time,
+    # and a second shutter press while one is in flight fails fast
+    if not camera_lock.acquire(blocking=False):
+        return jsonify({'success': False, 'error': 'busy'}), 429
+    try:
+        result = ultra_fast_dng_capture()
+    finally:
+        camera_lock.release()
     return jsonify(result)
 
+@app.route('/status')
 @app.route('/queue_status')
-def queue_status():
-    return jsonify({
-        'queue_size': raw_queue.qsize(),
-        'photo_count': get_photo_count()
-    })
-
 @app.route('/processing_status')
-def processing_status():
-    """Check how many background DNG processes are running"""
-    # Fix thread counting - safely check for thread name and target
-    active_threads = 0
-    for t in threading.enumerate():
-        thread_name = t.name.lower() if t.name else ""
-        if 'background_dng_processor' in thread_name:
-            active_threads += 1
-        elif hasattr(t, 'target') and t.target and 'background_dng_processor' in str(t.target):
-            active_threads += 1
-    
-    return jsonify({
-        'active_background_processes': active_threads,
-        'total_threads': len(threading.enumerate()),
-        'photo_count': get_photo_count(),
-        'queue_size': raw_queue.qsize()
+def status():
+    """Queue, background writer and photo count in one poll"""
+    response = jsonify({
+        'queue_size': len(raw_deque),
+        'queue_max': RAW_QUEUE_MAX,
+        'active_background_processes': active_bg,
+        'total_threads': threading.active_count(),
+        'photo_count': get_photo_count()
     })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
     
 HTML_TEMPLATE = '''
 <!DOCTYPE html>
@@ -341,15 +468,6 @@ HTML_TEMPLATE = '''
                     }, 3000);
                 });
         }
-        setInterval(() => {
-            fetch('/processing_status')
-                .then(response => response.json())
-                .then(data => {
-                    document.getElementById('queue-size').textContent = data.active_background_processes;
-                })
-                .catch(() => { });
-        }, 2000);
-
         function showStatus(message, type) {
             const status = document.getElementById('status');
             status.className = `status ${type}`;
@@ -359,12 +477,16 @@ HTML_TEMPLATE = '''
             setTimeout(() => status.classList.add('hidden'), 2000);
         }
 
-        // Update queue size every 2 seconds
+        // Update queue/writer status every 2 seconds
         setInterval(() => {
-            fetch('/queue_status')
+            fetch('/status')
                 .then(response => response.json())
                 .then(data => {
-                    document.getElementById('queue-size').textContent = data.queue_size;
+                    // DNGs queued or being written; when full, captures write synchronously (slower)
+                    const inFlight = data.queue_size + data.active_background_processes;
+                    document.getElementById('queue-size').textContent =
+                        inFlight >= data.queue_max ? `${inFlight} (full - slow capture)` : inFlight;
+                    document.getElementById('photo-count').textContent = data.photo_count;
                 })
                 .catch(() => { });
         }, 2000);
@@ -381,7 +503,11 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+# Page is static apart from the photo count - split once instead of running Jinja per GET
+HTML_PRE, HTML_POST = HTML_TEMPLATE.split('{{ photo_count }}')
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
     print("Starting Fast Pi Camera Raw Capture Server...")
     
     if init_camera():
@@ -389,12 +515,14 @@ if __name__ == '__main__':
         print(f"Web interface: http://0.0.0.0:8000")
 
         try:
-            app.run(host='0.0.0.0', port=8000, debug=False)
+            serve(app, host='0.0.0.0', port=8000, threads=4, channel_timeout=10)
         except KeyboardInterrupt:
             print("Shutting down...")
         finally:
             processing_active = False
-            raw_queue.put(None)
+            raw_evt.set()
+            if postprocess_executor:
+                postprocess_executor.shutdown(wait=False)
             if picam2:
                 picam2.stop()
                 print("Camera stopped. Goodbye!")
@@ -1,12 +1,129 @@
 import os
+import errno
 import shutil
+import functools
+import struct
+import heapq
+import re
 from pathlib import Path
 from datetime import datetime
-from operator import itemgetter
+from operator import attrgetter
+from dataclasses import dataclass
+from typing import Optional
 import piexif
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Buffer size for the userspace copy fallback
+COPY_BUFSIZE = 1024 * 1024
+# Bytes read from the start of a file (or embedded RAF JPEG) when looking for EXIF
+EXIF_HEAD_SIZE = 64 * 1024
+
+_JPG_SET = frozenset({'.jpg', '.jpeg'})
+_RAW_SET = frozenset({'.raf', '.arw'})
+# Camera-numbered names (Fujifilm DSCF, Sony _DSC) that can be ordered by mtime alone
+_DSCF_RE = re.compile(r'(DSCF|_DSC)\d+', re.I)
+
+
+@functools.lru_cache(maxsize=64)
+def _norm(path_str, is_nt):
+    """Cached resolve of a folder path (cleared whenever a folder selection changes)"""
+    p = str(Path(path_str).resolve().absolute())
+    return p.lower() if is_nt else p
+
+
+def _tiff_dto(buf, base):
+    """Find DateTimeOriginal in a TIFF block starting at buf[base]"""
+    order = buf[base:base + 2]
+    if order == b'II':
+        e = '<'
+    elif order == b'MM':
+        e = '>'
+    else:
+        return None
+    
+    def find_tag(ifd_off, tag):
+        pos = base + ifd_off
+        (count,) = struct.unpack_from(e + 'H', buf, pos)
+        for i in range(count):
+            t, _, _, value = struct.unpack_from(e + 'HHII', buf, pos + 2 + 12 * i)
+            if t == tag:
+                return value
+        return None
+    
+    (ifd0,) = struct.unpack_from(e + 'I', buf, base + 4)
+    exif_ifd = find_tag(ifd0, 0x8769)  # ExifIFD pointer
+    if exif_ifd is None:
+        return None
+    dto = find_tag(exif_ifd, 0x9003)  # DateTimeOriginal, offset to 20 ASCII bytes
+    if dto is None:
+        return None
+    date_str = buf[base + dto:base + dto + 19].decode('ascii')
+    return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+
+
+def _fast_dto(path):
+    """Read DateTimeOriginal from the file header (JPEG, RAF or TIFF-based RAW) without a full EXIF parse"""
+    with open(path, 'rb') as f:
+        head = f.read(EXIF_HEAD_SIZE)
+        if head.startswith(b'FUJIFILMCCD-RAW'):
+            # RAF: offset of the embedded JPEG (which carries the EXIF) is at byte 84
+            (jpeg_off,) = struct.unpack_from('>I', head, 84)
+            f.seek(jpeg_off)
+            head = f.read(EXIF_HEAD_SIZE)
+    
+    if head[:2] in (b'II', b'MM'):
+        return _tiff_dto(head, 0)
+    if head[:2] != b'\xff\xd8':
+        return None
+    
+    # Walk JPEG segments up to start-of-scan looking for the Exif APP1
+    pos = 2
+    while pos + 4 <= len(head) and head[pos] == 0xFF:
+        marker = head[pos + 1]
+        (seg_len,) = struct.unpack_from('>H', head, pos + 2)
+        if marker == 0xE1 and head[pos + 4:pos + 10] == b'Exif\0\0':
+            return _tiff_dto(head, pos + 10)
+        if marker == 0xDA:
+            break
+        pos += 2 + seg_len
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _ts_cached(path_str, mtime_ns):
+    """Capture time of a file, cached per (path, mtime) so repeat runs skip the EXIF read"""
+    try:
+        timestamp = _fast_dto(path_str)
+        if timestamp:
+            return timestamp
+    except (OSError, ValueError, struct.error):
+        pass
+    try:
+        exif_dict = piexif.load(path_str)
+        if piexif.ExifIFD.DateTimeOriginal in exif_dict["Exif"]:
+            date_str = exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal].decode()
+            return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+    except:
+        pass
+    return datetime.fromtimestamp(mtime_ns / 1e9)
+
+
+@dataclass
+class FileEntry:
+    """One shot (JPG and/or RAW sharing a base name) to be renamed"""
+    # Declared by hand: dataclass(slots=True) needs Python 3.10. A field default would
+    # clash with the slot, so ts_str is passed explicitly.
+    __slots__ = ('camera', 'timestamp', 'jpg_path', 'raw_path', 'base_name', 'ts_str')
+    camera: int
+    timestamp: datetime
+    jpg_path: Optional[str]
+    raw_path: Optional[str]
+    base_name: str
+    ts_str: str
 
 
 class CameraRenamerGUI:
@@ -20,8 +137,13 @@ class CameraRenamerGUI:
         self.output_dir = None
         self.keep_raw = tk.BooleanVar(value=True)
         self.move_files = tk.BooleanVar(value=False)
+        self.fast_timestamp = tk.BooleanVar(value=False)
+        
+        # Worker threads only queue log lines; the Tk thread drains them on a timer
+        self._log_q = queue.Queue()
         
         self.setup_ui()
+        self.root.after(50, self._drain_log)
     
     def setup_ui(self):
         # Title
@@ -84,6 +206,8 @@ class CameraRenamerGUI:
                       variable=self.keep_raw).pack(anchor="w")
         tk.Checkbutton(options_frame, text="Move files (unchecked = copy, keeps originals)", 
                       variable=self.move_files).pack(anchor="w")
+        tk.Checkbutton(options_frame, text="Use filename/mtime for speed (skips EXIF for DSCF/_DSC files)", 
+                      variable=self.fast_timestamp).pack(anchor="w")
         
         # Buttons
         button_frame = tk.Frame(self.root)
@@ -102,10 +226,7 @@ class CameraRenamerGUI:
     
     def normalize_path(self, path):
         """Normalize path for comparison (resolve, absolute, lowercase on Windows)"""
-        p = Path(path).resolve().absolute()
-        if os.name == 'nt':
-            return str(p).lower()
-        return str(p)
+        return _norm(str(path), os.name == 'nt')
     
     def validate_folders(self):
         """Validate that output folder is not the same as any input folder"""
@@ -133,7 +254,13 @@ class CameraRenamerGUI:
                 self.log(f"✗ ERROR: Output folder is same as Camera {cam_num} folder!")
                 return False
             
-            if output_normalized.startswith(cam_normalized + os.sep):
+            try:
+                common = os.path.commonpath([output_normalized, cam_normalized])
+            except ValueError:
+                # Different drives on Windows, can't be nested
+                common = ''
+            
+            if common == cam_normalized:
                 error_msg = (f"❌ WARNING ❌\n\n"
                            f"Output folder is INSIDE Camera {cam_num} folder!\n\n"
                            f"This could cause issues.\n\n"
@@ -144,7 +271,7 @@ class CameraRenamerGUI:
                 self.log(f"⚠ WARNING: Output folder is inside Camera {cam_num} folder!")
                 return False
             
-            if cam_normalized.startswith(output_normalized + os.sep):
+            if common == output_normalized:
                 error_msg = (f"❌ WARNING ❌\n\n"
                            f"Camera {cam_num} folder is INSIDE Output folder!\n\n"
                            f"This could cause issues.\n\n"
@@ -160,6 +287,7 @@ class CameraRenamerGUI:
     def select_camera(self, camera_num):
         folder = filedialog.askdirectory(title=f"Select Camera {camera_num} folder")
         if folder:
+            _norm.cache_clear()
             self.camera_dirs[camera_num] = folder
             display_name = folder if len(folder) <= 40 else "..." + folder[-37:]
             self.camera_labels[camera_num].config(text=display_name, fg="black")
@@ -168,6 +296,7 @@ class CameraRenamerGUI:
     def select_output(self):
         folder = filedialog.askdirectory(title="Select Output folder (must be different from inputs!)")
         if folder:
+            _norm.cache_clear()
             self.output_dir = folder
             display_name = folder if len(folder) <= 40 else "..." + folder[-37:]
             self.output_label.config(text=display_name, fg="black")
@@ -176,18 +305,21 @@ class CameraRenamerGUI:
     def clear_camera(self, camera_num):
         """Clear a specific camera folder selection"""
         if camera_num in self.camera_dirs:
+            _norm.cache_clear()
             del self.camera_dirs[camera_num]
             self.camera_labels[camera_num].config(text="Not selected", fg="gray")
             self.log(f"✗ Camera {camera_num} cleared")
     
     def clear_output(self):
         """Clear output folder selection"""
+        _norm.cache_clear()
         self.output_dir = None
         self.output_label.config(text="Not selected", fg="gray")
         self.log("✗ Output folder cleared")
     
     def clear_all(self):
         """Clear all folder selections"""
+        _norm.cache_clear()
         for i in range(1, 4):
             if i in self.camera_dirs:
                 del self.camera_dirs[i]
@@ -200,9 +332,20 @@ class CameraRenamerGUI:
         self.log("✗ All folders cleared")
     
     def log(self, message):
-        self.output_text.insert("end", message + "\n")
-        self.output_text.see("end")
-        self.root.update()
+        self._log_q.put(message)
+    
+    def _drain_log(self):
+        """Move queued log lines into the text widget, runs on the Tk thread every 50 ms"""
+        lines = []
+        while len(lines) < 500:
+            try:
+                lines.append(self._log_q.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self.output_text.insert("end", "\n".join(lines) + "\n")
+            self.output_text.see("end")
+        self.root.after(50, self._drain_log)
     
     def preview(self):
         self.output_text.delete(1.0, "end")
@@ -211,7 +354,9 @@ class CameraRenamerGUI:
         if not self.validate_folders():
             return
         
-        self._process_internal(copy_files=False)
+        thread = threading.Thread(target=self._process_internal, args=(False,))
+        thread.daemon = True
+        thread.start()
     
     def process(self):
         self.output_text.delete(1.0, "end")
@@ -236,7 +381,8 @@ class CameraRenamerGUI:
     def _process_internal(self, copy_files=True):
         try:
             output_dir = Path(self.output_dir)
-            renamer = CombinedCameraRenamer(output_dir, self.keep_raw.get(), self.move_files.get())
+            renamer = CombinedCameraRenamer(output_dir, self.keep_raw.get(), self.move_files.get(),
+                                            self.fast_timestamp.get())
             
             for cam_num, cam_path in sorted(self.camera_dirs.items()):
                 renamer.add_camera_source(cam_num, cam_path)
@@ -256,88 +402,163 @@ class CameraRenamerGUI:
                 
         except Exception as e:
             self.log(f"\n✗ Error: {str(e)}")
-            messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
+            self.root.after(0, messagebox.showerror, "Error", f"An error occurred:\n{str(e)}")
 
 
 class CombinedCameraRenamer:
-    def __init__(self, output_dir=None, keep_raw=True, move_files=False):
+    def __init__(self, output_dir=None, keep_raw=True, move_files=False, fast_timestamp=False):
         self.camera_sources = {}
         self.all_files = []
         self.output_dir = Path(output_dir) if output_dir else Path.cwd() / "combined_footage"
         self.keep_raw = keep_raw
         self.move_files = move_files
+        self.fast_timestamp = fast_timestamp
+        self._out_dev = None
     
     def add_camera_source(self, camera_num, source_path):
         self.camera_sources[camera_num] = Path(source_path)
     
-    def get_timestamp(self, file_path):
-        try:
-            exif_dict = piexif.load(str(file_path))
-            if piexif.ExifIFD.DateTimeOriginal in exif_dict["Exif"]:
-                date_str = exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal].decode()
-                return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-        except:
-            pass
-        return datetime.fromtimestamp(file_path.stat().st_mtime)
+    def get_timestamp(self, file_path, mtime_ns=None):
+        file_path = os.fspath(file_path)
+        if mtime_ns is None:
+            mtime_ns = os.stat(file_path).st_mtime_ns
+        if self.fast_timestamp and _DSCF_RE.match(os.path.basename(file_path)):
+            return datetime.fromtimestamp(mtime_ns / 1e9)
+        return _ts_cached(file_path, mtime_ns)
+    
+    def _move_fast(self, src, dst):
+        """Move a file, a plain rename when it already sits on the output device"""
+        src, dst = str(src), str(dst)
+        if os.stat(src).st_dev == self._out_dev:
+            try:
+                os.replace(src, dst)
+                return
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+        shutil.move(src, dst)
+    
+    def _sendfile(self, in_fd, out_fd):
+        """Copy in_fd to out_fd inside the kernel, returns False if sendfile can't be used here"""
+        if not hasattr(os, 'sendfile'):
+            return False
+        size = os.fstat(in_fd).st_size
+        offset = 0
+        while offset < size:
+            try:
+                sent = os.sendfile(out_fd, in_fd, offset, size - offset)
+            except OSError as e:
+                if offset == 0 and e.errno in (errno.EINVAL, errno.ENOTSUP, errno.ENOSYS, errno.ENOTSOCK):
+                    return False
+                raise
+            if sent == 0:
+                break
+            offset += sent
+        return True
+    
+    def _fastcopy(self, src, dst):
+        """Copy a file with os.sendfile (1 MiB buffered fallback) and keep its metadata like copy2"""
+        src, dst = str(src), str(dst)
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            in_fd = fsrc.fileno()
+            # Linux only: full readahead for the copy, then drop the source pages so the cache isn't flooded
+            fadvise = hasattr(os, 'posix_fadvise')
+            if fadvise:
+                os.posix_fadvise(in_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            if not self._sendfile(in_fd, fdst.fileno()):
+                shutil.copyfileobj(fsrc, fdst, COPY_BUFSIZE)
+            if fadvise:
+                os.posix_fadvise(in_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        shutil.copystat(src, dst)
+    
+    def _scan_camera(self, source_path, allowed):
+        """List (path, upper stem, lower ext, st_mtime_ns) for the wanted image files in one camera folder"""
+        found = []
+        # One directory pass instead of a glob per extension/case; plain strings, no Path parsing
+        with os.scandir(source_path) as it:
+            for e in it:
+                stem, ext = os.path.splitext(e.name)
+                ext_l = ext.lower()
+                if ext_l in allowed and e.is_file():
+                    found.append((e.path, stem.upper(), ext_l, e.stat(follow_symlinks=False).st_mtime_ns))
+        return found
     
     def collect_and_sort_files(self, gui):
         """Collect files and handle RAF+JPG pairs properly to avoid duplicates"""
         file_dict = {}
+        mtimes = {}
+        
+        allowed = _JPG_SET | _RAW_SET if self.keep_raw else _JPG_SET
         
         for camera_num, source_path in sorted(self.camera_sources.items()):
             if not source_path.exists():
                 gui.log(f"✗ Camera {camera_num} path does not exist: {source_path}")
                 return False
-            
-            file_extensions = ['*.jpg', '*.jpeg', '*.JPG', '*.JPEG']
-            if self.keep_raw:
-                file_extensions.extend(['*.raf', '*.RAF', '*.arw', '*.ARW'])
-            
-            files_found = []
-            for ext in file_extensions:
-                files_found.extend(source_path.glob(ext))
-            
-            gui.log(f"✓ Camera {camera_num}: Found {len(files_found)} files")
-            
-            # Group files by base name to detect pairs
-            for file_path in files_found:
-                base_name = file_path.stem.upper()
-                timestamp = self.get_timestamp(file_path)
+        
+        listings = {}
+        stamp_futures = {}
+        jpg_count = raw_count = 0
+        with ThreadPoolExecutor(max_workers=8) as ts_pool, \
+                ThreadPoolExecutor(max_workers=len(self.camera_sources)) as scan_pool:
+            # Scan all cards at once and start reading headers for a camera as soon as its listing is in
+            scans = {scan_pool.submit(self._scan_camera, source_path, allowed): camera_num
+                     for camera_num, source_path in self.camera_sources.items()}
+            for future in as_completed(scans):
+                found = future.result()
+                listings[scans[future]] = found
                 
-                if base_name not in file_dict:
-                    file_dict[base_name] = {
-                        'camera': camera_num,
-                        'timestamp': timestamp,
-                        'jpg': None,
-                        'raw': None
-                    }
+                # One timestamp per pair (JPG header is cheaper to read than the RAW)
+                ts_files = {}
+                for file_path, stem_u, ext_l, mtime_ns in found:
+                    mtimes[file_path] = mtime_ns
+                    if stem_u not in ts_files or ext_l in _JPG_SET:
+                        ts_files[stem_u] = file_path
+                for file_path in ts_files.values():
+                    stamp_futures[file_path] = ts_pool.submit(self.get_timestamp, file_path, mtimes[file_path])
+            
+            for camera_num in sorted(listings):
+                files_found = listings[camera_num]
+                gui.log(f"✓ Camera {camera_num}: Found {len(files_found)} files")
                 
-                ext_lower = file_path.suffix.lower()
-                if ext_lower in ['.jpg', '.jpeg']:
-                    file_dict[base_name]['jpg'] = file_path
-                elif ext_lower in ['.raf', '.arw']:
-                    file_dict[base_name]['raw'] = file_path
-                    file_dict[base_name]['timestamp'] = timestamp
-        
-        # Convert dict to list
-        for base_name, file_info in file_dict.items():
-            entry = {
-                'camera': file_info['camera'],
-                'timestamp': file_info['timestamp'],
-                'jpg_path': file_info['jpg'],
-                'raw_path': file_info['raw'],
-                'base_name': base_name
-            }
-            self.all_files.append(entry)
+                # Group files by base name to detect pairs
+                for file_path, stem_u, ext_l, _ in files_found:
+                    d = file_dict.setdefault(stem_u, {'camera': camera_num, 'jpg': None, 'raw': None})
+                    if ext_l in _JPG_SET:
+                        if d['jpg'] is None:
+                            jpg_count += 1
+                        d['jpg'] = file_path
+                    elif ext_l in _RAW_SET:
+                        if d['raw'] is None:
+                            raw_count += 1
+                        d['raw'] = file_path
+            
+            # Names shared across cameras can end up paired with a file that wasn't pre-read
+            stamps = []
+            for file_info in file_dict.values():
+                ts_path = file_info['jpg'] or file_info['raw']
+                future = stamp_futures.get(ts_path)
+                stamps.append(future.result() if future else self.get_timestamp(ts_path, mtimes[ts_path]))
+        
+        # Convert dict to per-camera lists
+        per_cam = {camera_num: [] for camera_num in self.camera_sources}
+        for (base_name, file_info), timestamp in zip(file_dict.items(), stamps):
+            entry = FileEntry(file_info['camera'], timestamp, file_info['jpg'], file_info['raw'], base_name, '')
+            per_cam[file_info['camera']].append(entry)
+        
+        # Each camera's files are close to chronological already; sort per camera then k-way merge
+        for entries in per_cam.values():
+            entries.sort(key=attrgetter('timestamp'))
+        self.all_files = list(heapq.merge(*per_cam.values(), key=attrgetter('timestamp')))
         
         if not self.all_files:
             gui.log("✗ No files found")
             return False
         
-        self.all_files.sort(key=itemgetter('timestamp'))
+        # Format once here; rename_and_copy and the report both print it
+        for file_entry in self.all_files:
+            file_entry.ts_str = file_entry.timestamp.strftime('%Y-%m-%d %H:%M:%S')
         
-        total_count = sum(1 for f in self.all_files if f['jpg_path']) + \
-                     sum(1 for f in self.all_files if f['raw_path'])
+        total_count = jpg_count + raw_count
         
         gui.log(f"\n✓ Total file entries: {len(self.all_files)}")
         gui.log(f"✓ Total individual files: {total_count}")
@@ -348,55 +569,70 @@ class CombinedCameraRenamer:
             gui.log("Preview mode - no files will be copied/moved\n")
         else:
             self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._out_dev = self.output_dir.stat().st_dev
             action = "Moving" if self.move_files else "Copying"
             gui.log(f"{action} files to: {self.output_dir}\n")
         
         sequence_num = 0
+        # Destination paths are built by string concatenation against this prefix
+        out_prefix = os.fspath(self.output_dir) + os.sep
         
-        for file_entry in self.all_files:
-            sequence_num += 1
-            padded_seq = str(sequence_num).zfill(4) if sequence_num < 10000 else str(sequence_num)
-            
-            timestamp_str = file_entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-            cam_num = file_entry['camera']
-            
-            # Process JPG if exists
-            if file_entry['jpg_path']:
-                jpg_path = file_entry['jpg_path']
-                new_jpg_name = f"DSCF{padded_seq}.JPG"
-                new_jpg_path = self.output_dir / new_jpg_name
-                
-                gui.log(f"[{sequence_num:5d}] CAM{cam_num} | {timestamp_str} | {jpg_path.name}")
-                gui.log(f"           → {new_jpg_name}")
+        # Copies run on a worker pool while this thread keeps logging; two workers per camera card.
+        # The preview/copy/move choice is made once here so the loop just calls do(src, dst)
+        copier = None
+        futures = []
+        if not copy_files:
+            do = lambda src, dst: None
+        else:
+            copier = ThreadPoolExecutor(max_workers=min(8, 2 * len(self.camera_sources)))
+            op = self._move_fast if self.move_files else self._fastcopy
+            do = lambda src, dst: futures.append(copier.submit(op, src, dst))
+        
+        try:
+            for file_entry in self.all_files:
+                sequence_num += 1
+                padded_seq = f"{sequence_num:04d}"
                 
-                if copy_files:
-                    if self.move_files:
-                        shutil.move(str(jpg_path), str(new_jpg_path))
-                    else:
-                        shutil.copy2(str(jpg_path), str(new_jpg_path))
-            
-            # Process RAW if exists
-            if file_entry['raw_path']:
-                raw_path = file_entry['raw_path']
-                raw_ext = raw_path.suffix.upper()
-                new_raw_name = f"DSCF{padded_seq}{raw_ext}"
-                new_raw_path = self.output_dir / new_raw_name
+                timestamp_str = file_entry.ts_str
+                cam_num = file_entry.camera
                 
-                if not file_entry['jpg_path']:
-                    gui.log(f"[{sequence_num:5d}] CAM{cam_num} | {timestamp_str} | {raw_path.name}")
-                else:
-                    gui.log(f"           + {raw_path.name}")
-                gui.log(f"           → {new_raw_name}")
+                # Process JPG if exists
+                if file_entry.jpg_path:
+                    jpg_path = file_entry.jpg_path
+                    new_jpg_name = f"DSCF{padded_seq}.JPG"
+                    new_jpg_path = out_prefix + new_jpg_name
+                    
+                    gui.log(f"[{sequence_num:5d}] CAM{cam_num} | {timestamp_str} | {os.path.basename(jpg_path)}")
+                    gui.log(f"           → {new_jpg_name}")
+                    
+                    do(jpg_path, new_jpg_path)
                 
-                if copy_files:
-                    if self.move_files:
-                        shutil.move(str(raw_path), str(new_raw_path))
+                # Process RAW if exists
+                if file_entry.raw_path:
+                    raw_path = file_entry.raw_path
+                    raw_name = os.path.basename(raw_path)
+                    raw_ext = os.path.splitext(raw_name)[1].upper()
+                    new_raw_name = f"DSCF{padded_seq}{raw_ext}"
+                    new_raw_path = out_prefix + new_raw_name
+                    
+                    if not file_entry.jpg_path:
+                        gui.log(f"[{sequence_num:5d}] CAM{cam_num} | {timestamp_str} | {raw_name}")
                     else:
-                        shutil.copy2(str(raw_path), str(new_raw_path))
+                        gui.log(f"           + {raw_name}")
+                    gui.log(f"           → {new_raw_name}")
+                    
+                    do(raw_path, new_raw_path)
+            
+            # Surface the first copy/move failure once everything has been queued
+            for future in as_completed(futures):
+                future.result()
+        finally:
+            if copier:
+                copier.shutdown(wait=True)
     
     def create_detailed_report(self):
         report_path = self.output_dir / f"renaming_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        with open(report_path, 'w') as f:
+        with open(report_path, 'w', buffering=1024 * 1024) as f:
             f.write(f"Combined Camera Renaming Report\n")
             f.write(f"=" * 80 + "\n")
             f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
@@ -407,22 +643,25 @@ class CombinedCameraRenamer:
             f.write(f"FILE RENAMING DETAILS\n")
             f.write(f"-" * 80 + "\n\n")
             
+            # Build the body in memory and write it once
+            parts = []
             for idx, file_entry in enumerate(self.all_files, 1):
-                padded_seq = str(idx).zfill(4) if idx < 10000 else str(idx)
-                timestamp_str = file_entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-                
-                f.write(f"[{idx:5d}] CAM{file_entry['camera']} | {timestamp_str}\n")
+                padded_seq = f"{idx:04d}"
+                parts.append(f"[{idx:5d}] CAM{file_entry.camera} | {file_entry.ts_str}\n")
                 
-                if file_entry['jpg_path']:
-                    f.write(f"  JPG Original: {file_entry['jpg_path'].name}\n")
-                    f.write(f"  JPG New: DSCF{padded_seq}.JPG\n")
+                if file_entry.jpg_path:
+                    parts.append(f"  JPG Original: {os.path.basename(file_entry.jpg_path)}\n"
+                                 f"  JPG New: DSCF{padded_seq}.JPG\n")
                 
-                if file_entry['raw_path']:
-                    raw_ext = file_entry['raw_path'].suffix.upper()
-                    f.write(f"  RAW Original: {file_entry['raw_path'].name}\n")
-                    f.write(f"  RAW New: DSCF{padded_seq}{raw_ext}\n")
+                if file_entry.raw_path:
+                    raw_name = os.path.basename(file_entry.raw_path)
+                    raw_ext = os.path.splitext(raw_name)[1].upper()
+                    parts.append(f"  RAW Original: {raw_name}\n"
+                                 f"  RAW New: DSCF{padded_seq}{raw_ext}\n")
                 
-                f.write("\n")
+                parts.append("\n")
+            
+            f.write(''.join(parts))
 
 
 if __name__ == "__main__":
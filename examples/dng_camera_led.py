@@ -4,10 +4,14 @@ Simple DNG Camera Interface - Flask Backend
 Single photo capture using background DNG processing
 """
 
-from flask import Flask, render_template_string, jsonify, request,send_file
+from flask import Flask, render_template_string, jsonify, request,send_file, send_from_directory, Response
+from waitress import serve
 import os
+import re
 import time
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import psutil
 import glob
 from pathlib import Path
@@ -15,13 +19,32 @@ import socket
 from libcamera import controls
 import RPi.GPIO as GPIO
 
+try:
+    import pigpio
+    PIGPIO_AVAILABLE = True
+except ImportError:
+    PIGPIO_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Import your picamera2 library
-from picamera2 import Picamera2
+from picamera2 import Picamera2, MappedArray
+import numpy as np
 from libcamera import Transform
 dng_folder = "dng"
 
 app = Flask(__name__)
 
+def ojsonify(data):
+    """jsonify, but encoded with orjson when it's installed (status/file polls run constantly)"""
+    if ORJSON_AVAILABLE:
+        return Response(orjson.dumps(data), mimetype='application/json')
+    return jsonify(data)
+
 # Global camera instance
 camera_state = {
     'picam2': None,
@@ -29,59 +52,132 @@ camera_state = {
     'capturing': False,
     'photo_counter': 0
 }
+# Requests are served on several threads; only one may drive the camera at a time
+capture_lock = threading.Lock()
+photo_counter_lock = threading.Lock()
+PHOTO_NAME_RE = re.compile(r"photo(\d+)\.dng")
+DOWNLOAD_NAME_RE = re.compile(r"^photo\d{3,6}\.dng$")
+# Long-lived worker that runs camera captures (replaced if a capture hangs)
+capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dng-cap')
+# Raw frames waiting to be written as DNG; bounded by the buffer pool below
+dng_write_q = queue.Queue()
+# Reusable raw frame buffers (allocated on first use, ~24MB each) so captures don't churn
+# the allocator and camera requests are released as soon as the pixels are copied out
+RAW_POOL_SIZE = 2
+free_raw_bufs = queue.Queue()
+for _ in range(RAW_POOL_SIZE):
+    free_raw_bufs.put(None)
+# DNGs on disk, bumped by dng_writer so status polls don't rescan the folder; None = count on next poll
+dng_count = None
+dng_count_lock = threading.Lock()
 
 # --- LED Pulse Control ---
 led_pin = 29  # Change this to your GPIO pin number
+HW_PWM_PINS = (12, 13, 18, 19)  # BCM pins with a hardware PWM channel (pigpio)
+# One breath: gamma 2.2 corrected ramp up then back down so brightness steps look even
+_LED_UP = tuple(int(((i / 20) ** 2.2) * 100) for i in range(21))
+_LED_RAMP = _LED_UP + _LED_UP[::-1]
 pwm_thread_stop = threading.Event()
+# Set on exit so recovery waits return immediately
+_shutdown_evt = threading.Event()
 pwm_running = False
 
 # --- Utility Functions ---
 def pwm_pulse_led():
     """Pulses the LED using PWM in a separate thread."""
     global pwm_running
+    pi = None
+    pwm = None
     
     try:
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(led_pin, GPIO.OUT)
-        pwm = GPIO.PWM(led_pin, 100) # 100 Hz frequency
-        pwm.start(0)
+        # Prefer hardware PWM: the carrier comes from the SoC and Python only updates the duty cycle
+        if PIGPIO_AVAILABLE and led_pin in HW_PWM_PINS:
+            pi = pigpio.pi()
+            if not pi.connected:
+                print("pigpiod not running, falling back to software PWM")
+                pi = None
+        
+        if pi is not None:
+            set_duty = lambda dc: pi.hardware_PWM(led_pin, 100, dc * 10000)  # 0-100% -> 0-1,000,000
+            print("LED using hardware PWM")
+        else:
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(led_pin, GPIO.OUT)
+            pwm = GPIO.PWM(led_pin, 100) # 100 Hz frequency
+            pwm.start(0)
+            set_duty = pwm.ChangeDutyCycle
         
         pwm_running = True
         
         while not pwm_thread_stop.is_set():
-            # Slowly increase brightness
-            for dc in range(0, 101, 5):
-                pwm.ChangeDutyCycle(dc)
-                time.sleep(0.05)
-            # Slowly decrease brightness
-            for dc in range(100, -1, -5):
-                pwm.ChangeDutyCycle(dc)
-                time.sleep(0.05)
+            for dc in _LED_RAMP:
+                set_duty(dc)
+                # Returns immediately on shutdown instead of finishing the breath
+                if pwm_thread_stop.wait(0.05):
+                    break
                 
     except Exception as e:
         print(f"LED PWM thread error: {e}")
         
     finally:
-        # Cleanup GPIO when thread stops
-        pwm.stop()
-        GPIO.cleanup()
         pwm_running = False
+        # Cleanup only what was set up, and only the LED pin, so a failed init doesn't mask its own error
+        try:
+            if pi is not None:
+                pi.hardware_PWM(led_pin, 0, 0)
+                pi.stop()
+            else:
+                if pwm is not None:
+                    pwm.stop()
+                GPIO.cleanup(led_pin)
+        except Exception as cleanup_error:
+            print(f"LED PWM cleanup error: {cleanup_error}")
         print("LED PWM thread stopped and GPIO cleaned up.")
 
 
+_local_ip = None
+
 def get_ip_address():
     """Attempts to get the local IP address of the Raspberry Pi."""
+    global _local_ip
+    # The LAN address doesn't change during a run; only a successful lookup is remembered
+    if _local_ip is not None:
+        return _local_ip
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip_address = s.getsockname()[0]
-        s.close()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            ip_address = s.getsockname()[0]
+        _local_ip = ip_address
         return ip_address
     except Exception:
         return "localhost"
 
+def read_meminfo():
+    """Memory figures straight from /proc/meminfo (one small read, no psutil objects)"""
+    with open('/proc/meminfo', 'rb') as f:
+        buf = f.read()
+    d = {}
+    for line in buf.split(b'\n'):
+        if b':' not in line:
+            continue
+        k, v = line.split(b':', 1)
+        d[k] = int(v.split()[0]) * 1024
+    total = d[b'MemTotal']
+    avail = d[b'MemAvailable']
+    used = total - avail
+    return {
+        'available_mb': avail / 1024 / 1024,
+        'total_mb': total / 1024 / 1024,
+        'used_mb': used / 1024 / 1024,
+        'percent': 100 * used / total
+    }
+
 def get_memory_info():
     """Get current memory usage in MB"""
+    try:
+        return read_meminfo()
+    except Exception:
+        pass
     try:
         mem = psutil.virtual_memory()
         return {
@@ -93,28 +189,50 @@ def get_memory_info():
     except Exception as e:
         return {'available_mb': 0, 'total_mb': 4096, 'used_mb': 0, 'percent': 0}
 
+# Last get_dng_files() result, rebuilt only when the folder's mtime changes
+_dng_cache = {'mtime': -1, 'files': []}
+
 def get_dng_files():
     """Get list of DNG files with sizes"""
-    files = []
-    dng_folder = "dng"
-    
-    # Update the glob pattern to look inside the 'dng' folder
     try:
-        for dng_file_path in glob.glob(os.path.join(dng_folder, "photo*.dng")):
-            stat = os.stat(dng_file_path)
-            # Use os.path.basename() to get just the filename
-            dng_file_name = os.path.basename(dng_file_path)
-            files.append({
-                'name': dng_file_name,
-                'size_mb': stat.st_size / 1024 / 1024,
-                'modified': stat.st_mtime
-            })
+        mtime = os.stat(dng_folder).st_mtime_ns
+        if mtime == _dng_cache['mtime']:
+            return _dng_cache['files']
+        
+        files = []
+        with os.scandir(dng_folder) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith("photo") and name.endswith(".dng"):
+                    stat = entry.stat()
+                    files.append({
+                        'name': name,
+                        'size_mb': stat.st_size / 1024 / 1024,
+                        'modified': stat.st_mtime
+                    })
         files.sort(key=lambda x: x['modified'], reverse=True)
     except Exception as e:
         print(f"Error getting DNG files: {e}")
         return []
+    
+    _dng_cache['files'] = files
+    _dng_cache['mtime'] = mtime
     return files
 
+def invalidate_dng_cache():
+    """Force the next get_dng_files() to rescan (file contents changed without a directory change)"""
+    _dng_cache['mtime'] = -1
+
+def scan_next_photo_number():
+    """Next photo number after the highest existing photoNNN.dng, so deleted gaps never get overwritten"""
+    highest = 0
+    with os.scandir(dng_folder) as entries:
+        for entry in entries:
+            match = PHOTO_NAME_RE.fullmatch(entry.name)
+            if match:
+                highest = max(highest, int(match.group(1)))
+    return highest + 1
+
 def create_dng_folder():
     """Create DNG folder if it doesn't exist"""
     if not os.path.exists(dng_folder):
@@ -134,10 +252,15 @@ def initialize_camera():
         picam2 = Picamera2()
         
         # Configure for DNG capture - single shot optimized
+        # Only the raw stream is saved: keep main small/cheap and allocate no display/encode streams.
+        # Requests are copied into pooled buffers and released at once, so 3 camera buffers is plenty.
+        # queue=False so a triggered shot is always a fresh frame, not one already sitting in the queue.
         config = picam2.create_still_configuration(
+            main={"size": (640, 480), "format": "YUV420"},
             raw={"size": (4608, 2592)},
             lores=None,
             display=None,
+            encode=None,
             buffer_count=3,
             queue=False,
             transform=Transform(vflip=True , hflip=True)
@@ -169,12 +292,21 @@ def initialize_camera():
         
         picam2.start()
         
-        # Let camera settle
-        time.sleep(2)
+        # Let camera settle: stop as soon as AE reports locked (and AF has a lens position),
+        # with the old fixed 2s as the upper bound
+        has_af = 'AfMode' in controls
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline:
+            md = picam2.capture_metadata()
+            if md.get('AeLocked') and (not has_af or md.get('LensPosition') is not None):
+                break
         
         camera_state['picam2'] = picam2
         camera_state['initialized'] = True
-        camera_state['photo_counter'] = len(get_dng_files()) + 1
+        # Scan once; after a reinit the running counter is already correct
+        with photo_counter_lock:
+            if camera_state['photo_counter'] == 0:
+                camera_state['photo_counter'] = scan_next_photo_number()
         
         print("✅ Camera initialized successfully")
         # Start the LED pulsing thread
@@ -189,33 +321,24 @@ def initialize_camera():
         print(f"❌ Camera initialization failed: {e}")
         return False
     
-def _capture_thread(picam2_instance, filename, result_container):
-    """Internal thread function to perform the capture with result tracking."""
-    try:
-        result_container['started'] = True
-        result_container['start_time'] = time.time()
-        picam2_instance.capture_file(filename, name="raw")
-        result_container['completed'] = True
-        result_container['end_time'] = time.time()
-    except Exception as e:
-        result_container['error'] = e
-        result_container['completed'] = False
-
 def capture_single_dng():
     """Capture a single DNG photo with improved timeout handling."""
     global camera_state
+    global capture_executor
     
     if not camera_state['initialized']:
         return {'success': False, 'error': 'Camera is not initialized'}
     
-    if camera_state['capturing']:
+    if not capture_lock.acquire(blocking=False):
         return {'success': False, 'error': 'Already capturing'}
     
     camera_state['capturing'] = True
     
     try:
         picam2 = camera_state['picam2']
-        photo_num = camera_state['photo_counter']
+        with photo_counter_lock:
+            photo_num = camera_state['photo_counter']
+            camera_state['photo_counter'] += 1
         
         filename = os.path.join(dng_folder, f"photo{photo_num:03d}.dng")
         
@@ -224,39 +347,21 @@ def capture_single_dng():
         mem_before = get_memory_info()
         start_time = time.time()
         
-        # Create result container for thread communication
-        result_container = {
-            'started': False,
-            'completed': False,
-            'error': None,
-            'start_time': None,
-            'end_time': None
-        }
-        
-        # Start the capture in a separate thread
-        capture_thread = threading.Thread(
-            target=_capture_thread, 
-            args=(picam2, filename, result_container)
-        )
-        capture_thread.daemon = True  # Dies with main thread
-        capture_thread.start()
-        
-        # Wait for capture to actually start (up to 2 seconds)
-        start_timeout = 2.0
-        start_check_time = time.time()
-        while not result_container['started'] and (time.time() - start_check_time) < start_timeout:
-            time.sleep(0.1)
-        
-        if not result_container['started']:
-            print("❌ Capture failed to start within timeout")
-            return {'success': False, 'error': 'Capture failed to start - camera may be frozen'}
-        
-        # Wait for capture to complete (up to 10 seconds total)
-        capture_timeout = 10.0
-        capture_thread.join(timeout=capture_timeout)
-        
-        if capture_thread.is_alive() or not result_container['completed']:
+        # Blocks only while every pooled buffer is still waiting on the writer
+        raw_buf = free_raw_bufs.get()
+        
+        # Grab the frame on the persistent worker so a frozen camera can't hang this request;
+        # the DNG itself is written by dng_writer so the next shot doesn't wait on disk
+        future = capture_executor.submit(grab_raw, picam2, raw_buf)
+        try:
+            raw_buf, metadata = future.result(timeout=10.0)  # Re-raises any capture error
+        except FutureTimeout:
+            # The stuck worker keeps its buffer; the pool gets an empty slot back instead
+            free_raw_bufs.put(None)
             print("❌ Capture timed out or failed to complete")
+            # The worker is stuck inside the camera; later captures get a fresh one
+            capture_executor.shutdown(wait=False)
+            capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dng-cap')
             # Force camera restart
             try:
                 camera_state['picam2'].stop()
@@ -273,32 +378,25 @@ def capture_single_dng():
                 'restart_required': True
             }
         
-        # Check for capture errors
-        if result_container['error']:
-            raise result_container['error']
-            
-        capture_time = time.time() - start_time
-        mem_after = get_memory_info()
+        except Exception:
+            free_raw_bufs.put(raw_buf)
+            raise
         
-        file_size_mb = 0
-        if os.path.exists(filename):
-            file_size_mb = os.path.getsize(filename) / 1024 / 1024
-        else:
-            return {'success': False, 'error': 'Capture completed but file not found'}
+        dng_write_q.put((picam2, raw_buf, metadata, picam2.camera_config["raw"], filename))
         
-        camera_state['photo_counter'] += 1
+        capture_time = time.time() - start_time
+        mem_after = get_memory_info()
         
         result = {
             'success': True,
             'filename': os.path.basename(filename),  # Just filename, not full path
             'photo_number': photo_num,
             'capture_time': f"{capture_time:.3f}s",
-            'size_mb': file_size_mb,
             'memory_info': mem_after,
             'memory_freed': mem_after['available_mb'] - mem_before['available_mb']
         }
         
-        print(f"✅ Captured {filename} in {capture_time:.3f}s ({file_size_mb:.1f}MB)")
+        print(f"✅ Captured {filename} in {capture_time:.3f}s, queued for write")
         return result
         
     except Exception as e:
@@ -306,13 +404,59 @@ def capture_single_dng():
         return {'success': False, 'error': str(e)}
         
     finally:
-        camera_state['capturing'] = False   
+        camera_state['capturing'] = False
+        capture_lock.release()
            
+def grab_raw(picam2, raw_buf):
+    """Copy the next raw frame into raw_buf (reallocated if missing/wrong size) and release the request"""
+    request = picam2.capture_request()
+    try:
+        with MappedArray(request, "raw", reshape=False) as mapped:
+            if raw_buf is None or raw_buf.shape != mapped.array.shape:
+                raw_buf = np.empty_like(mapped.array)
+            np.copyto(raw_buf, mapped.array)
+        metadata = request.get_metadata()
+    finally:
+        request.release()
+    return raw_buf, metadata
+
+def dng_writer():
+    """Background thread: write queued raw frames to DNG and return their buffers to the pool"""
+    global dng_count
+    while True:
+        picam2, raw_buf, metadata, raw_config, filename = dng_write_q.get()
+        # Write under a hidden temp name (kept ending in .dng, PiDNG appends it otherwise) and rename
+        # into place, so the file list and downloads never see a half-written photo
+        tmp = os.path.join(os.path.dirname(filename), "." + os.path.basename(filename))
+        try:
+            # Same serializer CompletedRequest.save_dng() uses, minus the request
+            picam2.helpers.save_dng(raw_buf, metadata, raw_config, tmp)
+            # Rename under the lock so a status recount can't see the file and then have it counted again
+            with dng_count_lock:
+                os.replace(tmp, filename)
+                if dng_count is not None:
+                    dng_count += 1
+            print(f"💾 Wrote {filename}")
+        except Exception as e:
+            print(f"❌ DNG write failed for {filename}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        finally:
+            free_raw_bufs.put(raw_buf)
+            invalidate_dng_cache()
+            dng_write_q.task_done()
+
 def emergency_memory_cleanup():
     """Emergency memory cleanup function"""
     global camera_state
+    global dng_count
     
     try:
+        with dng_count_lock:
+            dng_count = None
+
         mem_before = get_memory_info()['available_mb']
         
         # Stop and close camera
@@ -328,10 +472,9 @@ def emergency_memory_cleanup():
         
         # Force garbage collection
         import gc
-        for _ in range(5):
-            gc.collect()
+        gc.collect(2)
         
-        time.sleep(1.0)
+        _shutdown_evt.wait(1.0)
         
         mem_after = get_memory_info()['available_mb']
         freed = mem_after - mem_before
@@ -343,22 +486,30 @@ def emergency_memory_cleanup():
         return {'success': False, 'error': str(e)}
 
 # Flask Routes
+_INDEX_BYTES = None
+
 @app.route('/')
 def index():
     """Serve the HTML interface"""
-    with open('simple_dng_trigger.html', 'r') as f:
-        html_content = f.read()
-    return html_content
+    global _INDEX_BYTES
+    # The page doesn't change during a run; read it from disk once
+    if _INDEX_BYTES is None:
+        _INDEX_BYTES = Path('simple_dng_trigger.html').read_bytes()
+    return Response(_INDEX_BYTES, mimetype='text/html')
 
 @app.route('/test_status')
 def test_status():
     """Get current camera status"""
+    global dng_count
     memory = get_memory_info()
-    files = get_dng_files()
+    with dng_count_lock:
+        if dng_count is None:
+            dng_count = len(get_dng_files())
+        count = dng_count
     
-    return jsonify({
-        'queue_size': 0,
-        'dng_count': len(files),
+    return ojsonify({
+        'queue_size': dng_write_q.qsize(),
+        'dng_count': count,
         'memory_mb': memory['available_mb'],
         'camera_status': 'Capturing' if camera_state['capturing'] else 
                          ('Ready' if camera_state['initialized'] else 'Initializing'),
@@ -369,20 +520,21 @@ def test_status():
 def test_files():
     """Get list of captured DNG photos"""
     files = get_dng_files()
-    return jsonify({'files': files})
+    return ojsonify({'files': files})
 
 @app.route('/capture_single_dng', methods=['POST'])
 def capture_single_dng_route():
     """Capture a single DNG photo with auto-restart on timeout"""
     if camera_state['capturing']:
-        return jsonify({'success': False, 'error': 'Already capturing a photo'})
+        return ojsonify({'success': False, 'error': 'Already capturing a photo'})
     
     result = capture_single_dng()
     
     # Auto-restart camera if needed
     if not result['success'] and result.get('restart_required'):
         print("🔄 Attempting to reinitialize camera...")
-        time.sleep(2)
+        if _shutdown_evt.wait(2):
+            return ojsonify(result)
         if initialize_camera():
             print("✅ Camera reinitialized successfully")
             result['camera_restarted'] = True
@@ -390,44 +542,51 @@ def capture_single_dng_route():
             print("❌ Camera reinitialize failed")
             result['camera_restart_failed'] = True
     
-    return jsonify(result)
+    return ojsonify(result)
 
 @app.route('/download/<filename>')
 def download_file(filename):
     """Download DNG file"""
-    try:
-        dng_path = os.path.join("dng", filename)
-        if os.path.exists(dng_path) and filename.endswith('.dng'):
-            return send_file(dng_path, as_attachment=True, download_name=filename)
-        else:
-            return "File not found", 404
-    except Exception as e:
-        return f"Error downloading file: {e}", 500
+    # Only names this app writes are served; anything else (../, .partial, other files) is rejected
+    # before touching the filesystem
+    if not DOWNLOAD_NAME_RE.fullmatch(filename):
+        return "Bad file name", 400
+    # send_from_directory does the containment check and 404s missing files;
+    # conditional/etag let repeat downloads get 304 or a Range response instead of the whole DNG
+    return send_from_directory(dng_folder, filename, as_attachment=True,
+                               conditional=True, etag=True)
 
 @app.route('/emergency_cleanup', methods=['POST'])
 def emergency_cleanup_route():
     """Emergency memory cleanup and camera restart"""
     result = emergency_memory_cleanup()
     initialize_camera()
-    return jsonify(result)
+    return ojsonify(result)
 
 if __name__ == '__main__':
     print("📸 Simple DNG Camera Interface Starting...")
     print("🎯 Single photo capture with background DNG processing")
     print(f"🌐 Open http://{get_ip_address()}:8080 to access the camera")
     create_dng_folder()
+    threading.Thread(target=dng_writer, daemon=True, name="dng-writer").start()
     # Initialize camera on startup
     if not initialize_camera():
         print("Fatal Error: Could not initialize camera. Exiting.")
         exit(1)
     
     try:
-        app.run(host='0.0.0.0', port=8080, debug=True, use_reloader=False)
+        # Production WSGI server: no debugger overhead, status/file polls and downloads are served
+        # on their own threads, and send_file responses go out through wsgi.file_wrapper
+        serve(app, host='0.0.0.0', port=8080, threads=8)
     except KeyboardInterrupt:
         print("\nServer shutting down...")
     finally:
         # Stop the PWM thread and perform cleanup
         pwm_thread_stop.set()
+        _shutdown_evt.set()
+        capture_executor.shutdown(wait=False)
+        # Let queued DNGs finish writing before the camera (and its buffers) go away
+        dng_write_q.join()
         if camera_state['picam2']:
             camera_state['picam2'].stop()
             camera_state['picam2'].close()
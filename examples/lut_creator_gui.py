@@ -3,6 +3,7 @@
 1D LUT Creator - Interactive GUI Tool
 Create custom 1D LUTs with real-time preview and reference images
 Requires: pip install dearpygui opencv-python numpy pillow
+Optional: pip install numba (compiled LUT generation)
 """
 
 import dearpygui.dearpygui as dpg
@@ -10,6 +11,204 @@ import cv2
 import numpy as np
 from pathlib import Path
 import time
+import math
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, fastmath=True, error_model='numpy')
+    def _s_curve_scalar(v, strength):
+        """S-curve for contrast (single value)"""
+        if abs(strength) < 0.001:
+            return v
+        steepness = strength * 4.0
+        curved = 1.0 / (1.0 + math.exp(-steepness * (v - 0.5)))
+        curve_min = 1.0 / (1.0 + math.exp(steepness * 0.5))
+        curve_max = 1.0 / (1.0 + math.exp(-steepness * 0.5))
+        return (curved - curve_min) / (curve_max - curve_min)
+    
+    @njit(cache=True, fastmath=True, error_model='numpy')
+    def _lut_kernel(p, red, green, blue):
+        """Single-pass version of LUTCreator._compute_lut, p holds the values in LUTCreator.params order"""
+        (contrast, brightness, exposure, blacks_lift, whites_clip, toe, shoulder,
+         gamma, red_gamma, green_gamma, blue_gamma,
+         lift_master, gamma_master, gain_master,
+         red_shadows, red_midtones, red_highlights,
+         green_shadows, green_midtones, green_highlights,
+         blue_shadows, blue_midtones, blue_highlights,
+         temperature, tint, vibrance, saturation,
+         red_tint, green_tint, blue_tint,
+         curve_type, curve_strength,
+         red_from_green, red_from_blue, green_from_red, green_from_blue, blue_from_red, blue_from_green,
+         hue_shift) = (p[0], p[1], p[2], p[3], p[4], p[5], p[6], p[7], p[8], p[9], p[10], p[11], p[12],
+                       p[13], p[14], p[15], p[16], p[17], p[18], p[19], p[20], p[21], p[22], p[23], p[24],
+                       p[25], p[26], p[27], p[28], p[29], p[30], p[31], p[32], p[33], p[34], p[35], p[36],
+                       p[37], p[38])
+        
+        exp_mult = 2.0 ** exposure
+        curve_log_exp = curve_strength * 2.0
+        mixing = (abs(red_from_green) > 0.001 or abs(red_from_blue) > 0.001 or
+                  abs(green_from_red) > 0.001 or abs(green_from_blue) > 0.001 or
+                  abs(blue_from_red) > 0.001 or abs(blue_from_green) > 0.001)
+        hue = abs(hue_shift) * 0.3
+        
+        for i in range(256):
+            x = i / 255.0
+            r = x
+            g = x
+            b = x
+            
+            # Exposure, white balance
+            if abs(exposure) > 0.001:
+                r *= exp_mult
+                g *= exp_mult
+                b *= exp_mult
+            if abs(temperature) > 0.001:
+                r *= 1.0 + temperature * 0.3
+                b *= 1.0 - temperature * 0.3
+            if abs(tint) > 0.001:
+                if tint > 0:
+                    r *= 1.0 + tint * 0.2
+                    b *= 1.0 + tint * 0.2
+                    g *= 1.0 - tint * 0.15
+                else:
+                    g *= 1.0 - tint * 0.2
+            
+            # Global gamma, brightness, contrast
+            if abs(gamma - 1.0) > 0.001:
+                r = min(max(r, 0.0), 1.0) ** (1.0 / gamma)
+                g = min(max(g, 0.0), 1.0) ** (1.0 / gamma)
+                b = min(max(b, 0.0), 1.0) ** (1.0 / gamma)
+            if abs(brightness) > 0.001:
+                r += brightness
+                g += brightness
+                b += brightness
+            if abs(contrast) > 0.001:
+                r = _s_curve_scalar(r, contrast)
+                g = _s_curve_scalar(g, contrast)
+                b = _s_curve_scalar(b, contrast)
+            
+            # Curve type
+            if curve_type == 1 and curve_strength > 0.001:
+                r = math.log1p(min(max(r, 0.0), 1.0) * curve_log_exp) / math.log1p(curve_log_exp)
+                g = math.log1p(min(max(g, 0.0), 1.0) * curve_log_exp) / math.log1p(curve_log_exp)
+                b = math.log1p(min(max(b, 0.0), 1.0) * curve_log_exp) / math.log1p(curve_log_exp)
+            elif curve_type == 2 and curve_strength > 0.001:
+                r = (math.exp(min(max(r, 0.0), 1.0) * curve_log_exp) - 1) / (math.exp(curve_log_exp) - 1)
+                g = (math.exp(min(max(g, 0.0), 1.0) * curve_log_exp) - 1) / (math.exp(curve_log_exp) - 1)
+                b = (math.exp(min(max(b, 0.0), 1.0) * curve_log_exp) - 1) / (math.exp(curve_log_exp) - 1)
+            elif curve_type == 3 and curve_strength > 0.001:
+                r = _s_curve_scalar(r, curve_strength)
+                g = _s_curve_scalar(g, curve_strength)
+                b = _s_curve_scalar(b, curve_strength)
+            
+            # Toe and shoulder (branchless: max() zeroes the term outside the affected range)
+            if toe > 0.001:
+                r -= r * toe * max(0.18 - r, 0.0) / 0.18
+                g -= g * toe * max(0.18 - g, 0.0) / 0.18
+                b -= b * toe * max(0.18 - b, 0.0) / 0.18
+            if shoulder > 0.001:
+                d = max(r - 0.75, 0.0)
+                r -= shoulder * d * d / 0.25
+                d = max(g - 0.75, 0.0)
+                g -= shoulder * d * d / 0.25
+                d = max(b - 0.75, 0.0)
+                b -= shoulder * d * d / 0.25
+            
+            # Blacks lift / whites clip
+            if blacks_lift > 0.001:
+                r = r * (1.0 - blacks_lift) + blacks_lift
+                g = g * (1.0 - blacks_lift) + blacks_lift
+                b = b * (1.0 - blacks_lift) + blacks_lift
+            if abs(whites_clip - 1.0) > 0.001:
+                r = min(r, whites_clip)
+                g = min(g, whites_clip)
+                b = min(b, whites_clip)
+            
+            # Tonal range masks (functions of the input level only, each is 0 at its range edges)
+            shadow_mask = max(0.3 - x, 0.0) / 0.3
+            lgg_mid_mask = max(1.0 - abs(x - 0.5) / 0.3, 0.0)
+            smh_mid_mask = max(1.0 - abs(x - 0.5) / 0.2, 0.0)
+            highlight_mask = max(x - 0.7, 0.0) / 0.3
+            
+            # Lift/gamma/gain
+            if abs(lift_master) > 0.001:
+                r += lift_master * shadow_mask
+                g += lift_master * shadow_mask
+                b += lift_master * shadow_mask
+            if abs(gamma_master - 1.0) > 0.001:
+                k = 1.0 + (gamma_master - 1.0) * lgg_mid_mask
+                r *= k
+                g *= k
+                b *= k
+            if abs(gain_master - 1.0) > 0.001:
+                k = 1.0 + (gain_master - 1.0) * highlight_mask
+                r *= k
+                g *= k
+                b *= k
+            
+            # Per-channel gamma
+            if abs(red_gamma - 1.0) > 0.001:
+                r = min(max(r, 0.0), 1.0) ** (1.0 / red_gamma)
+            if abs(green_gamma - 1.0) > 0.001:
+                g = min(max(g, 0.0), 1.0) ** (1.0 / green_gamma)
+            if abs(blue_gamma - 1.0) > 0.001:
+                b = min(max(b, 0.0), 1.0) ** (1.0 / blue_gamma)
+            
+            # Per-channel shadows/mids/highlights
+            r = (r + red_shadows * shadow_mask) * (1.0 + (red_midtones - 1.0) * smh_mid_mask)
+            r *= 1.0 + (red_highlights - 1.0) * highlight_mask
+            g = (g + green_shadows * shadow_mask) * (1.0 + (green_midtones - 1.0) * smh_mid_mask)
+            g *= 1.0 + (green_highlights - 1.0) * highlight_mask
+            b = (b + blue_shadows * shadow_mask) * (1.0 + (blue_midtones - 1.0) * smh_mid_mask)
+            b *= 1.0 + (blue_highlights - 1.0) * highlight_mask
+            
+            # Color tints
+            if abs(red_tint) > 0.001:
+                r += red_tint
+            if abs(green_tint) > 0.001:
+                g += green_tint
+            if abs(blue_tint) > 0.001:
+                b += blue_tint
+            
+            # Saturation / vibrance
+            if abs(saturation) > 0.001 or abs(vibrance) > 0.001:
+                luma = 0.299 * r + 0.587 * g + 0.114 * b
+                if abs(saturation) > 0.001:
+                    r = luma + (r - luma) * (1.0 + saturation)
+                    g = luma + (g - luma) * (1.0 + saturation)
+                    b = luma + (b - luma) * (1.0 + saturation)
+                if abs(vibrance) > 0.001:
+                    max_rgb = max(r, g, b)
+                    current_sat = (max_rgb - min(r, g, b)) / max_rgb if max_rgb > 0.001 else 0.0
+                    k = 1.0 + vibrance * (1.0 - current_sat)
+                    r = luma + (r - luma) * k
+                    g = luma + (g - luma) * k
+                    b = luma + (b - luma) * k
+            
+            # Channel mixing
+            if mixing:
+                r, g, b = (r + g * red_from_green + b * red_from_blue,
+                           g + r * green_from_red + b * green_from_blue,
+                           b + r * blue_from_red + g * blue_from_green)
+            
+            # Hue shift
+            if hue_shift > 0.001:
+                r, g, b = (r * (1 - hue) + g * hue,
+                           g * (1 - hue) + b * hue,
+                           b * (1 - hue) + r * hue)
+            elif hue_shift < -0.001:
+                r, g, b = (r * (1 - hue) + b * hue,
+                           g * (1 - hue) + r * hue,
+                           b * (1 - hue) + g * hue)
+            
+            red[i] = min(max(r, 0.0), 1.0)
+            green[i] = min(max(g, 0.0), 1.0)
+            blue[i] = min(max(b, 0.0), 1.0)
 
 class LUTCreator:
     def __init__(self):
@@ -81,318 +280,376 @@ class LUTCreator:
             'hue_shift': 0.0,        # -0.3 to 0.3 (approximate hue rotation)
         }
         
+        self._defaults = dict(self.params)
+        
+        # Slider values are rounded to the resolution that visibly matters (0.001 unless listed),
+        # so float jitter in the last digits of a drag doesn't defeat the LUT cache
+        self._param_quant = {'exposure': 100, 'gamma': 200,
+                             'red_gamma': 200, 'green_gamma': 200, 'blue_gamma': 200}
+        self._smh_keys = tuple((f'{c}_shadows', f'{c}_midtones', f'{c}_highlights')
+                               for c in ('red', 'green', 'blue'))
+        
         self.lut_name = "custom_lut"
         self.processing_time = 0.0
+        self._show_timing = False  # Timing readout is opt-in (checkbox under the preview)
+        
+        # Shadow/midtone/highlight weights only depend on the input level, so build them once
+        # (the shadow and highlight ranges are shared by lift/gain and the per-channel controls)
+        # float32 throughout: the LUT ends up as 8-bit levels, so float64 only doubles the bytes moved
+        self._x = x = np.linspace(0, 1, 256, dtype=np.float32)
+        self._shadow_mask = np.where(x < 0.3, (0.3 - x) / 0.3, 0.0)
+        self._lgg_mid_mask = np.where((x >= 0.2) & (x <= 0.8), 1.0 - np.abs(x - 0.5) / 0.3, 0.0)
+        self._smh_mid_mask = np.where((x >= 0.3) & (x <= 0.7), 1.0 - np.abs(x - 0.5) / 0.2, 0.0)
+        self._highlight_mask = np.where(x > 0.7, (x - 0.7) / 0.3, 0.0)
+        self._luma_weights = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        self._scratch_max = np.empty_like(x)
+        self._scratch_min = np.empty_like(x)
+        
+        # LUT cache - curves are only regenerated when a parameter value actually changes
+        self._param_keys = tuple(self.params)
+        self._param_sig = None
+        self._lut_cache = None
+        self._table_cache = None
+        
+        # Preview-sized copy of the loaded image and the parameters it was last rendered with
+        self._preview_src = None
+        self._preview_sig = None
+        
+        # Slider callbacks only mark the preview dirty; the render loop redraws at most once per frame
+        self._dirty = False
+        self._last_update = 0.0
+        self._lut_out = np.empty((self.preview_size[1], self.preview_size[0], 3), dtype=np.float32)
+        # RGBA texture buffer, filled in place and handed to DearPyGui as a flat view
+        self._preview_rgba = np.zeros((self.preview_size[1], self.preview_size[0], 4), dtype=np.float32)
+        # uint8 level -> 0-1 float for DearPyGui textures, as a LUT so it's a single pass
+        self._unit_table = np.arange(256, dtype=np.float32) / 255.0
         
     def generate_lut_from_params(self):
+        """Return (red, green, blue) LUT curves, reusing the last ones if no parameter changed"""
+        sig = tuple(self.params[k] for k in self._param_keys)
+        if sig != self._param_sig:
+            self._lut_cache = self._compute_lut_jit(sig) if NUMBA_AVAILABLE else self._compute_lut()
+            self._table_cache = None
+            self._param_sig = sig
+        return self._lut_cache
+    
+    def get_preview_lut(self):
+        """Return the current LUT as a cached (256, 1, 3) BGR float32 table for cv2.LUT"""
+        red_lut, green_lut, blue_lut = self.generate_lut_from_params()
+        if self._table_cache is None:
+            # Quantized to 8-bit levels like an applied LUT, then scaled to 0-1 for the float texture
+            lut = np.empty((256, 1, 3), dtype=np.float32)
+            for i, curve in enumerate((blue_lut, green_lut, red_lut)):
+                lut[:, 0, i] = self._unit_table[(curve * 255).astype(np.uint8)]
+            self._table_cache = lut
+        return self._table_cache
+    
+    def _compute_lut_jit(self, sig):
+        """Generate LUT curves with the compiled single-pass kernel"""
+        red, green, blue = (np.empty(256, dtype=np.float32) for _ in range(3))
+        _lut_kernel(np.array(sig, dtype=np.float64), red, green, blue)
+        return red, green, blue
+    
+    def _compute_lut(self):
         """Generate 1D LUT curves from current parameters - COMPREHENSIVE VERSION"""
-        x = np.linspace(0, 1, 256)
+        x = self._x
+        
+        # Parameters moved off neutral - usually only a few, and with none the LUT is linear
+        active = {k for k, v in self.params.items() if v != self._defaults[k]}
+        if not active:
+            return x.copy(), x.copy(), x.copy()
+        
+        def column(r, g, b):
+            """Per-channel coefficients as a (3, 1) column that broadcasts over the curve block"""
+            return np.array([[r], [g], [b]], dtype=np.float32)
         
-        # ===== HELPER FUNCTIONS =====
+        # ===== HELPER FUNCTIONS (in place on a block of curves) =====
         
         def apply_s_curve(vals, strength):
             """S-curve for contrast"""
             if abs(strength) < 0.001:
-                return vals
+                return
             midpoint = 0.5
             steepness = strength * 4.0
-            curved = 1.0 / (1.0 + np.exp(-steepness * (vals - midpoint)))
-            curve_min = 1.0 / (1.0 + np.exp(steepness * midpoint))
-            curve_max = 1.0 / (1.0 + np.exp(-steepness * (1.0 - midpoint)))
-            return (curved - curve_min) / (curve_max - curve_min)
+            curve_min = 1.0 / (1.0 + math.exp(steepness * midpoint))
+            curve_max = 1.0 / (1.0 + math.exp(-steepness * (1.0 - midpoint)))
+            np.subtract(vals, midpoint, out=vals)
+            np.multiply(vals, -steepness, out=vals)
+            np.exp(vals, out=vals)
+            np.add(vals, 1.0, out=vals)
+            np.reciprocal(vals, out=vals)
+            np.subtract(vals, curve_min, out=vals)
+            np.divide(vals, curve_max - curve_min, out=vals)
         
         def apply_log_curve(vals, strength):
             """Logarithmic curve (compresses highlights, expands shadows)"""
             if strength < 0.001:
-                return vals
-            return np.log1p(vals * strength) / np.log1p(strength)
+                return
+            np.clip(vals, 0, 1, out=vals)
+            np.multiply(vals, strength, out=vals)
+            np.log1p(vals, out=vals)
+            np.divide(vals, np.log1p(strength), out=vals)
         
         def apply_exp_curve(vals, strength):
             """Exponential curve (expands highlights, compresses shadows)"""
             if strength < 0.001:
-                return vals
-            return (np.exp(vals * strength) - 1) / (np.exp(strength) - 1)
+                return
+            np.clip(vals, 0, 1, out=vals)
+            np.multiply(vals, strength, out=vals)
+            np.exp(vals, out=vals)
+            np.subtract(vals, 1, out=vals)
+            np.divide(vals, np.exp(strength) - 1, out=vals)
         
         def apply_toe(vals, amount):
             """Film-style toe (gentle shadow rolloff)"""
             if amount < 0.001:
-                return vals
-            # Toe affects lower range
-            return np.where(vals < 0.18,
-                          vals * (1.0 - amount * (0.18 - vals) / 0.18),
-                          vals)
+                return
+            # Toe affects lower range: vals * (1 - amount * (0.18 - vals) / 0.18) below 0.18
+            t = tmp[:len(vals)]
+            np.subtract(0.18, vals, out=t)
+            np.maximum(t, 0.0, out=t)
+            np.multiply(t, vals, out=t)
+            np.multiply(t, amount / 0.18, out=t)
+            np.subtract(vals, t, out=vals)
         
         def apply_shoulder(vals, amount):
             """Film-style shoulder (gentle highlight rolloff)"""
             if amount < 0.001:
-                return vals
-            # Shoulder affects upper range
-            return np.where(vals > 0.75,
-                          0.75 + (vals - 0.75) * (1.0 - amount * (vals - 0.75) / 0.25),
-                          vals)
+                return
+            # Shoulder affects upper range: 0.75 + d * (1 - amount * d / 0.25) with d = vals - 0.75
+            t = tmp[:len(vals)]
+            np.subtract(vals, 0.75, out=t)
+            np.maximum(t, 0.0, out=t)
+            np.square(t, out=t)
+            np.multiply(t, amount / 0.25, out=t)
+            np.subtract(vals, t, out=vals)
+        
+        def apply_gamma(vals, gamma):
+            """Power curve on the clipped 0-1 range"""
+            np.clip(vals, 0, 1, out=vals)
+            np.power(vals, 1.0 / gamma, out=vals)
         
         # ===== START WITH LINEAR =====
-        red = x.copy()
-        green = x.copy()
-        blue = x.copy()
+        # One (3, 256) block of red/green/blue rows: every step is a single ufunc call over it,
+        # with per-channel coefficients as (3, 1) columns and channel mixes as 3x3 matrices
+        rgb = np.empty((3, 256), dtype=np.float32)
+        rgb[0] = x
+        tmp = np.empty_like(rgb)  # Scratch for masked terms
+        row = tmp[0]
+        
+        # The global steps treat all channels alike, so until the first per-channel step they run
+        # on one master curve (the red row) that is copied to green/blue once the channels diverge
+        cur = rgb[:1]
         
         # ===== STEP 1: EXPOSURE (multiplicative, first) =====
         if abs(self.params['exposure']) > 0.001:
             exp_mult = 2.0 ** self.params['exposure']  # Stops to multiplier
-            red = red * exp_mult
-            green = green * exp_mult
-            blue = blue * exp_mult
+            np.multiply(cur, exp_mult, out=cur)
         
         # ===== STEP 2: WHITE BALANCE / TEMPERATURE / TINT =====
+        if abs(self.params['temperature']) > 0.001 or abs(self.params['tint']) > 0.001:
+            rgb[1:] = rgb[0]
+            cur = rgb
+        
         if abs(self.params['temperature']) > 0.001:
             # Temperature: positive = warm (more red/yellow), negative = cool (more blue)
             temp = self.params['temperature']
-            red = red * (1.0 + temp * 0.3)
-            blue = blue * (1.0 - temp * 0.3)
+            np.multiply(rgb, column(1.0 + temp * 0.3, 1.0, 1.0 - temp * 0.3), out=rgb)
         
         if abs(self.params['tint']) > 0.001:
             # Tint: positive = magenta (more red/blue), negative = green
             tint = self.params['tint']
             if tint > 0:
-                red = red * (1.0 + tint * 0.2)
-                blue = blue * (1.0 + tint * 0.2)
-                green = green * (1.0 - tint * 0.15)
+                np.multiply(rgb, column(1.0 + tint * 0.2, 1.0 - tint * 0.15, 1.0 + tint * 0.2), out=rgb)
             else:
-                green = green * (1.0 - tint * 0.2)
+                np.multiply(rgb, column(1.0, 1.0 - tint * 0.2, 1.0), out=rgb)
         
         # ===== STEP 3: GLOBAL GAMMA =====
         if abs(self.params['gamma'] - 1.0) > 0.001:
-            red = np.power(np.clip(red, 0, 1), 1.0 / self.params['gamma'])
-            green = np.power(np.clip(green, 0, 1), 1.0 / self.params['gamma'])
-            blue = np.power(np.clip(blue, 0, 1), 1.0 / self.params['gamma'])
+            apply_gamma(cur, self.params['gamma'])
         
         # ===== STEP 4: BRIGHTNESS (additive) =====
         if abs(self.params['brightness']) > 0.001:
-            red = red + self.params['brightness']
-            green = green + self.params['brightness']
-            blue = blue + self.params['brightness']
+            np.add(cur, self.params['brightness'], out=cur)
         
         # ===== STEP 5: CONTRAST (S-curve) =====
         if abs(self.params['contrast']) > 0.001:
-            red = apply_s_curve(red, self.params['contrast'])
-            green = apply_s_curve(green, self.params['contrast'])
-            blue = apply_s_curve(blue, self.params['contrast'])
+            apply_s_curve(cur, self.params['contrast'])
         
         # ===== STEP 6: CURVE TYPE (Log/Exp/S-curve alternative) =====
         if self.params['curve_type'] == 1 and self.params['curve_strength'] > 0.001:
             # Log curve
-            strength = self.params['curve_strength'] * 2.0
-            red = apply_log_curve(np.clip(red, 0, 1), strength)
-            green = apply_log_curve(np.clip(green, 0, 1), strength)
-            blue = apply_log_curve(np.clip(blue, 0, 1), strength)
+            apply_log_curve(cur, self.params['curve_strength'] * 2.0)
         elif self.params['curve_type'] == 2 and self.params['curve_strength'] > 0.001:
             # Exp curve
-            strength = self.params['curve_strength'] * 2.0
-            red = apply_exp_curve(np.clip(red, 0, 1), strength)
-            green = apply_exp_curve(np.clip(green, 0, 1), strength)
-            blue = apply_exp_curve(np.clip(blue, 0, 1), strength)
+            apply_exp_curve(cur, self.params['curve_strength'] * 2.0)
         elif self.params['curve_type'] == 3 and self.params['curve_strength'] > 0.001:
             # Alternative S-curve
-            red = apply_s_curve(red, self.params['curve_strength'])
-            green = apply_s_curve(green, self.params['curve_strength'])
-            blue = apply_s_curve(blue, self.params['curve_strength'])
+            apply_s_curve(cur, self.params['curve_strength'])
         
         # ===== STEP 7: TOE AND SHOULDER (Film response) =====
-        if self.params['toe'] > 0.001:
-            red = apply_toe(red, self.params['toe'])
-            green = apply_toe(green, self.params['toe'])
-            blue = apply_toe(blue, self.params['toe'])
-        
-        if self.params['shoulder'] > 0.001:
-            red = apply_shoulder(red, self.params['shoulder'])
-            green = apply_shoulder(green, self.params['shoulder'])
-            blue = apply_shoulder(blue, self.params['shoulder'])
+        apply_toe(cur, self.params['toe'])
+        apply_shoulder(cur, self.params['shoulder'])
         
         # ===== STEP 8: BLACKS LIFT / WHITES CLIP =====
         if self.params['blacks_lift'] > 0.001:
             lift = self.params['blacks_lift']
-            red = red * (1.0 - lift) + lift
-            green = green * (1.0 - lift) + lift
-            blue = blue * (1.0 - lift) + lift
+            np.multiply(cur, 1.0 - lift, out=cur)
+            np.add(cur, lift, out=cur)
         
         if abs(self.params['whites_clip'] - 1.0) > 0.001:
-            clip_point = self.params['whites_clip']
-            red = np.minimum(red, clip_point)
-            green = np.minimum(green, clip_point)
-            blue = np.minimum(blue, clip_point)
+            np.minimum(cur, self.params['whites_clip'], out=cur)
         
         # ===== STEP 9: LIFT/GAMMA/GAIN (Professional grading) =====
         if abs(self.params['lift_master']) > 0.001:
             # Lift affects shadows
-            shadow_mask = np.where(x < 0.3, (0.3 - x) / 0.3, 0.0)
-            red = red + self.params['lift_master'] * shadow_mask
-            green = green + self.params['lift_master'] * shadow_mask
-            blue = blue + self.params['lift_master'] * shadow_mask
+            np.multiply(self._shadow_mask, self.params['lift_master'], out=row)
+            np.add(cur, row, out=cur)
         
         if abs(self.params['gamma_master'] - 1.0) > 0.001:
             # Gamma affects midtones
-            midtone_mask = np.where((x >= 0.2) & (x <= 0.8),
-                                   1.0 - np.abs(x - 0.5) / 0.3, 0.0)
-            red = red * (1.0 + (self.params['gamma_master'] - 1.0) * midtone_mask)
-            green = green * (1.0 + (self.params['gamma_master'] - 1.0) * midtone_mask)
-            blue = blue * (1.0 + (self.params['gamma_master'] - 1.0) * midtone_mask)
+            np.multiply(self._lgg_mid_mask, self.params['gamma_master'] - 1.0, out=row)
+            np.add(row, 1.0, out=row)
+            np.multiply(cur, row, out=cur)
         
         if abs(self.params['gain_master'] - 1.0) > 0.001:
             # Gain affects highlights
-            highlight_mask = np.where(x > 0.7, (x - 0.7) / 0.3, 0.0)
-            red = red * (1.0 + (self.params['gain_master'] - 1.0) * highlight_mask)
-            green = green * (1.0 + (self.params['gain_master'] - 1.0) * highlight_mask)
-            blue = blue * (1.0 + (self.params['gain_master'] - 1.0) * highlight_mask)
+            np.multiply(self._highlight_mask, self.params['gain_master'] - 1.0, out=row)
+            np.add(row, 1.0, out=row)
+            np.multiply(cur, row, out=cur)
+        
+        # Channels are handled separately from here on
+        if cur is not rgb:
+            rgb[1:] = rgb[0]
         
         # ===== STEP 10: PER-CHANNEL GAMMA =====
-        if abs(self.params['red_gamma'] - 1.0) > 0.001:
-            red = np.power(np.clip(red, 0, 1), 1.0 / self.params['red_gamma'])
-        if abs(self.params['green_gamma'] - 1.0) > 0.001:
-            green = np.power(np.clip(green, 0, 1), 1.0 / self.params['green_gamma'])
-        if abs(self.params['blue_gamma'] - 1.0) > 0.001:
-            blue = np.power(np.clip(blue, 0, 1), 1.0 / self.params['blue_gamma'])
+        gammas = [self.params['red_gamma'], self.params['green_gamma'], self.params['blue_gamma']]
+        if all(abs(g - 1.0) > 0.001 for g in gammas):
+            # All three moved: one power call with a per-channel exponent column
+            apply_gamma(rgb, column(*gammas))
+        else:
+            for c, g in zip(rgb, gammas):
+                if abs(g - 1.0) > 0.001:
+                    apply_gamma(c, g)
         
         # ===== STEP 11: PER-CHANNEL SHADOWS/MIDS/HIGHLIGHTS =====
-        # Shadows
-        shadow_mask = np.where(x < 0.3, (0.3 - x) / 0.3, 0.0)
-        red = red + self.params['red_shadows'] * shadow_mask
-        green = green + self.params['green_shadows'] * shadow_mask
-        blue = blue + self.params['blue_shadows'] * shadow_mask
-        
-        # Midtones
-        midtone_mask = np.where((x >= 0.3) & (x <= 0.7),
-                               1.0 - np.abs(x - 0.5) / 0.2, 0.0)
-        red = red * (1.0 + (self.params['red_midtones'] - 1.0) * midtone_mask)
-        green = green * (1.0 + (self.params['green_midtones'] - 1.0) * midtone_mask)
-        blue = blue * (1.0 + (self.params['blue_midtones'] - 1.0) * midtone_mask)
-        
-        # Highlights
-        highlight_mask = np.where(x > 0.7, (x - 0.7) / 0.3, 0.0)
-        red = red * (1.0 + (self.params['red_highlights'] - 1.0) * highlight_mask)
-        green = green * (1.0 + (self.params['green_highlights'] - 1.0) * highlight_mask)
-        blue = blue * (1.0 + (self.params['blue_highlights'] - 1.0) * highlight_mask)
+        # (neutral values are an exact no-op here, so only ranges with a moved slider are applied)
+        shadows, midtones, highlights = zip(*self._smh_keys)
+        if active.intersection(shadows):
+            np.multiply(column(*(self.params[k] for k in shadows)), self._shadow_mask, out=tmp)
+            np.add(rgb, tmp, out=rgb)
+        if active.intersection(midtones):
+            np.multiply(column(*(self.params[k] - 1.0 for k in midtones)), self._smh_mid_mask, out=tmp)
+            np.add(tmp, 1.0, out=tmp)
+            np.multiply(rgb, tmp, out=rgb)
+        if active.intersection(highlights):
+            np.multiply(column(*(self.params[k] - 1.0 for k in highlights)), self._highlight_mask, out=tmp)
+            np.add(tmp, 1.0, out=tmp)
+            np.multiply(rgb, tmp, out=rgb)
         
         # ===== STEP 12: COLOR TINTS =====
-        if abs(self.params['red_tint']) > 0.001:
-            red = red + self.params['red_tint']
-        if abs(self.params['green_tint']) > 0.001:
-            green = green + self.params['green_tint']
-        if abs(self.params['blue_tint']) > 0.001:
-            blue = blue + self.params['blue_tint']
+        tints = [self.params[k] for k in ('red_tint', 'green_tint', 'blue_tint')]
+        if any(abs(t) > 0.001 for t in tints):
+            np.add(rgb, column(*(t if abs(t) > 0.001 else 0.0 for t in tints)), out=rgb)
         
         # ===== STEP 13: SATURATION / VIBRANCE (approximated) =====
         if abs(self.params['saturation']) > 0.001 or abs(self.params['vibrance']) > 0.001:
             # Calculate luminance (approximate)
-            luma = 0.299 * red + 0.587 * green + 0.114 * blue
+            luma = self._luma_weights @ rgb
             
             # Saturation: push away from or toward gray
             if abs(self.params['saturation']) > 0.001:
                 sat = self.params['saturation']
-                red = luma + (red - luma) * (1.0 + sat)
-                green = luma + (green - luma) * (1.0 + sat)
-                blue = luma + (blue - luma) * (1.0 + sat)
+                np.subtract(rgb, luma, out=rgb)
+                np.multiply(rgb, 1.0 + sat, out=rgb)
+                np.add(rgb, luma, out=rgb)
             
             # Vibrance: smart saturation (affects muted colors more)
             if abs(self.params['vibrance']) > 0.001:
                 vib = self.params['vibrance']
-                # Calculate current saturation level
-                max_rgb = np.maximum(np.maximum(red, green), blue)
-                min_rgb = np.minimum(np.minimum(red, green), blue)
-                current_sat = np.where(max_rgb > 0.001, (max_rgb - min_rgb) / max_rgb, 0.0)
-                # Apply vibrance more to less saturated areas
-                vib_strength = vib * (1.0 - current_sat)
-                red = luma + (red - luma) * (1.0 + vib_strength)
-                green = luma + (green - luma) * (1.0 + vib_strength)
-                blue = luma + (blue - luma) * (1.0 + vib_strength)
+                # Calculate current saturation level (0 where the brightest channel is ~black)
+                max_rgb = np.max(rgb, axis=0, out=self._scratch_max)
+                min_rgb = np.min(rgb, axis=0, out=self._scratch_min)
+                np.subtract(max_rgb, min_rgb, out=min_rgb)
+                row.fill(0.0)
+                np.divide(min_rgb, max_rgb, out=row, where=max_rgb > 0.001)
+                # Apply vibrance more to less saturated areas: 1 + vib * (1 - sat)
+                np.multiply(row, -vib, out=row)
+                np.add(row, 1.0 + vib, out=row)
+                np.subtract(rgb, luma, out=rgb)
+                np.multiply(rgb, row, out=rgb)
+                np.add(rgb, luma, out=rgb)
         
         # ===== STEP 14: CHANNEL MIXING =====
         if (abs(self.params['red_from_green']) > 0.001 or abs(self.params['red_from_blue']) > 0.001 or
             abs(self.params['green_from_red']) > 0.001 or abs(self.params['green_from_blue']) > 0.001 or
             abs(self.params['blue_from_red']) > 0.001 or abs(self.params['blue_from_green']) > 0.001):
             
-            # Save originals
-            r_orig = red.copy()
-            g_orig = green.copy()
-            b_orig = blue.copy()
-            
-            # Mix channels
-            red = r_orig + g_orig * self.params['red_from_green'] + b_orig * self.params['red_from_blue']
-            green = g_orig + r_orig * self.params['green_from_red'] + b_orig * self.params['green_from_blue']
-            blue = b_orig + r_orig * self.params['blue_from_red'] + g_orig * self.params['blue_from_green']
+            # Each output channel is itself plus weighted amounts of the other two
+            p = self.params
+            mix = np.array([[1.0, p['red_from_green'], p['red_from_blue']],
+                            [p['green_from_red'], 1.0, p['green_from_blue']],
+                            [p['blue_from_red'], p['blue_from_green'], 1.0]], dtype=np.float32)
+            np.matmul(mix, rgb, out=tmp)
+            rgb[:] = tmp
         
         # ===== STEP 15: HUE SHIFT (approximated in 1D) =====
         if abs(self.params['hue_shift']) > 0.001:
             # Simplified hue shift by rotating RGB
             # This is a crude approximation - true hue shift needs 3D LUT
-            shift = self.params['hue_shift']
-            r_orig = red.copy()
-            g_orig = green.copy()
-            b_orig = blue.copy()
-            
-            # Rotate color channels (limited hue shift)
-            if shift > 0:
-                red = r_orig * (1 - shift * 0.3) + g_orig * (shift * 0.3)
-                green = g_orig * (1 - shift * 0.3) + b_orig * (shift * 0.3)
-                blue = b_orig * (1 - shift * 0.3) + r_orig * (shift * 0.3)
+            s = abs(self.params['hue_shift']) * 0.3
+            
+            # Rotate color channels (limited hue shift): R<-G, G<-B, B<-R for positive shifts
+            if self.params['hue_shift'] > 0:
+                rot = [[1 - s, s, 0.0], [0.0, 1 - s, s], [s, 0.0, 1 - s]]
             else:
-                shift = -shift
-                red = r_orig * (1 - shift * 0.3) + b_orig * (shift * 0.3)
-                green = g_orig * (1 - shift * 0.3) + r_orig * (shift * 0.3)
-                blue = b_orig * (1 - shift * 0.3) + g_orig * (shift * 0.3)
+                rot = [[1 - s, 0.0, s], [s, 1 - s, 0.0], [0.0, s, 1 - s]]
+            np.matmul(np.array(rot, dtype=np.float32), rgb, out=tmp)
+            rgb[:] = tmp
         
         # ===== FINAL CLAMP =====
-        red = np.clip(red, 0.0, 1.0)
-        green = np.clip(green, 0.0, 1.0)
-        blue = np.clip(blue, 0.0, 1.0)
+        np.clip(rgb, 0.0, 1.0, out=rgb)
         
+        red, green, blue = rgb
         return red, green, blue
     
-    def apply_lut_to_image(self, image, red_lut, green_lut, blue_lut):
-        """Apply LUT to image using OpenCV (fast)"""
-        start = time.perf_counter()
-        
-        # Split channels
-        b, g, r = cv2.split(image)
-        
-        # Convert LUT to uint8 lookup tables
-        r_table = (red_lut * 255).astype(np.uint8)
-        g_table = (green_lut * 255).astype(np.uint8)
-        b_table = (blue_lut * 255).astype(np.uint8)
+    def apply_lut_to_image(self, image, lut):
+        """Apply a (256, 1, 3) LUT to a BGR image using OpenCV (fast)"""
+        if self._show_timing:
+            start = time.perf_counter()
         
-        # Apply LUTs
-        r_new = cv2.LUT(r, r_table)
-        g_new = cv2.LUT(g, g_table)
-        b_new = cv2.LUT(b, b_table)
+        # All channels go through a single cv2.LUT call (instead of split + 3 LUTs + merge),
+        # written into the reused preview buffer
+        result = cv2.LUT(image, lut, self._lut_out)
         
-        # Merge back
-        result = cv2.merge([b_new, g_new, r_new])
-        
-        self.processing_time = (time.perf_counter() - start) * 1000
+        if self._show_timing:
+            self.processing_time = (time.perf_counter() - start) * 1000
         return result
     
     def update_preview(self):
         """Update the preview image with current LUT"""
-        if self.current_image is None:
+        if self._preview_src is None:
             return
         
-        # Generate LUT from current parameters
-        red_lut, green_lut, blue_lut = self.generate_lut_from_params()
-        
-        # Apply to image
-        result = self.apply_lut_to_image(self.current_image.copy(), red_lut, green_lut, blue_lut)
+        # Generate LUT from current parameters (cached if nothing changed)
+        lut = self.get_preview_lut()
+        if self._param_sig == self._preview_sig:
+            return  # Already showing this LUT
         
-        # Resize for display
-        display_img = cv2.resize(result, self.preview_size)
+        # A 1D LUT is per-pixel, so applying it to the preview-sized image looks the same
+        # as applying it at full resolution and resizing afterwards
+        result = self.apply_lut_to_image(self._preview_src, lut)
         
-        # Convert to RGBA for DearPyGui
-        display_img = cv2.cvtColor(display_img, cv2.COLOR_BGR2RGBA)
-        display_img = display_img.astype(np.float32) / 255.0
+        # Convert to RGBA for DearPyGui (already 0-1 floats from the float32 LUT)
+        cv2.cvtColor(result, cv2.COLOR_BGR2RGBA, self._preview_rgba)
         
-        # Update texture
-        dpg.set_value("preview_texture", display_img.flatten())
+        # Update texture - ravel() of the contiguous buffer is a view, flatten() would copy it
+        dpg.set_value("preview_texture", self._preview_rgba.ravel())
         
         # Update processing time display
-        dpg.set_value("processing_time", f"Processing: {self.processing_time:.1f}ms")
+        if self._show_timing:
+            dpg.set_value("processing_time", f"Processing: {self.processing_time:.1f}ms")
+        self._preview_sig = self._param_sig
     
     def load_image(self, sender, app_data):
         """Load image from file"""
@@ -409,13 +666,15 @@ class LUTCreator:
             return
         
         self.current_image = img
-        self.reference_image = img.copy()  # Save original as reference
+        self.reference_image = img  # Original as reference - nothing modifies it, so no copy needed
+        # LUT is applied to this preview-sized copy; INTER_AREA averages properly when shrinking
+        self._preview_src = cv2.resize(img, self.preview_size, interpolation=cv2.INTER_AREA)
+        self._preview_sig = None  # New image, must re-render
         print(f"Loaded: {filepath} ({img.shape[1]}x{img.shape[0]})")
         
         # Update reference texture with original
-        display_ref = cv2.resize(self.reference_image, self.preview_size)
-        display_ref = cv2.cvtColor(display_ref, cv2.COLOR_BGR2RGBA)
-        display_ref = display_ref.astype(np.float32) / 255.0
+        display_ref = cv2.cvtColor(self._preview_src, cv2.COLOR_BGR2RGBA)
+        display_ref = cv2.LUT(display_ref, self._unit_table)
         dpg.set_value("reference_texture", display_ref.flatten())
         
         # Update preview with LUT applied
@@ -478,15 +737,33 @@ class LUTCreator:
     def parameter_changed(self, sender, value):
         """Called when any parameter slider changes"""
         param_name = sender
-        self.params[param_name] = value
-        self.update_preview()
+        q = self._param_quant.get(param_name, 1000)
+        self.params[param_name] = round(value * q) / q
+        self._dirty = True
     
     def curve_type_changed(self, sender, value):
         """Called when curve type combo changes"""
         curve_map = {"Linear": 0, "Log": 1, "Exp": 2, "S-Curve": 3}
         self.params['curve_type'] = curve_map.get(value, 0)
+        self._dirty = True
+    
+    def _maybe_update(self):
+        """Called every frame - redraw the preview if parameters changed, at most every 16ms"""
+        if not self._dirty:
+            return
+        now = time.perf_counter()
+        if now - self._last_update < 0.016:
+            return
+        self._dirty = False
+        self._last_update = now
         self.update_preview()
     
+    def timing_toggled(self, sender, value):
+        """Called when the timing checkbox changes"""
+        self._show_timing = value
+        if not value:
+            dpg.set_value("processing_time", "")
+    
     def name_changed(self, sender, value):
         """Called when LUT name changes"""
         self.lut_name = value
@@ -501,7 +778,7 @@ class LUTCreator:
         with dpg.texture_registry():
             dpg.add_raw_texture(width=self.preview_size[0], 
                               height=self.preview_size[1],
-                              default_value=preview_data.flatten(),
+                              default_value=self._preview_rgba.ravel(),
                               format=dpg.mvFormat_Float_rgba,
                               tag="preview_texture")
             
@@ -730,7 +1007,10 @@ class LUTCreator:
                 with dpg.child_window(width=850):
                     dpg.add_text("Preview with LUT", color=(100, 255, 100))
                     dpg.add_image("preview_texture")
-                    dpg.add_text("", tag="processing_time")
+                    with dpg.group(horizontal=True):
+                        dpg.add_checkbox(label="Show timing", default_value=False,
+                                       callback=self.timing_toggled)
+                        dpg.add_text("", tag="processing_time")
                     
                     dpg.add_separator()
                     
@@ -742,7 +1022,10 @@ class LUTCreator:
         dpg.setup_dearpygui()
         dpg.show_viewport()
         dpg.set_primary_window("main_window", True)
-        dpg.start_dearpygui()
+        # Manual render loop so slider drags are coalesced into one preview update per frame
+        while dpg.is_dearpygui_running():
+            self._maybe_update()
+            dpg.render_dearpygui_frame()
         dpg.destroy_context()
 
 def main():
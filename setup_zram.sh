@@ -0,0 +1,54 @@
+#!/bin/bash
+# Setup script to add a compressed zram swap device on the Raspberry Pi
+# Keeps memory spikes during burst DNG capture in RAM instead of swapping to the SD card
+# Safe to run on every boot (e.g. ExecStartPre= of camera-viewfinder.service)
+
+set -e
+
+ZRAM_SIZE="${ZRAM_SIZE:-256M}"
+ZRAM_ALGO="${ZRAM_ALGO:-zstd}"
+ZRAM_PRIORITY=100
+
+echo "=================================="
+echo "Setting up zram swap"
+echo "=================================="
+echo ""
+
+# Check if running as root
+if [ "$EUID" -ne 0 ]; then
+    echo "Please run as root (use sudo)"
+    exit 1
+fi
+
+# 1. Skip if a zram swap device is already active
+echo "[1/3] Checking existing swap..."
+if grep -q '^/dev/zram' /proc/swaps; then
+    echo "✓ zram swap already active"
+    cat /proc/swaps
+    exit 0
+fi
+
+# 2. Load module and create the device
+echo ""
+echo "[2/3] Creating ${ZRAM_SIZE} zram device (${ZRAM_ALGO})..."
+modprobe zram
+
+# Fall back to lz4 if this kernel was built without zstd for zram
+if ! grep -qw "$ZRAM_ALGO" /sys/block/zram0/comp_algorithm 2>/dev/null; then
+    echo "Algorithm ${ZRAM_ALGO} not available, using lz4"
+    ZRAM_ALGO=lz4
+fi
+
+ZRAM_DEV=$(zramctl --find --size "$ZRAM_SIZE" --algorithm "$ZRAM_ALGO")
+echo "✓ Created $ZRAM_DEV"
+
+# 3. Enable as high-priority swap so it is used before any SD-card swap file
+echo ""
+echo "[3/3] Enabling swap on $ZRAM_DEV..."
+mkswap "$ZRAM_DEV" > /dev/null
+swapon -p "$ZRAM_PRIORITY" "$ZRAM_DEV"
+echo "✓ zram swap enabled (priority ${ZRAM_PRIORITY})"
+
+echo ""
+cat /proc/swaps
+echo ""
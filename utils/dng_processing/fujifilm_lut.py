@@ -26,6 +26,10 @@ class SimpleLUTApplier:
             'portra': self.create_portra_lut,
             'neutral': self.create_neutral_lut
         }
+        # uint8 BGR tables keyed on LUT name + curve bytes
+        self._lut_cache = {}
+        # S-curves of the 256-level base ramp, keyed on strength (3 decimals)
+        self._s_curve_cache = {}
     
     def create_classic_chrome_lut(self):
         """Classic Chrome film simulation"""
@@ -50,13 +54,10 @@ class SimpleLUTApplier:
     
     def create_velvia_lut(self):
         """Velvia - vibrant, saturated look"""
-        curve_size = 256
-        base_curve = np.linspace(0, 1, curve_size)
-        
         # High contrast S-curves
-        red_curve = self._s_curve(base_curve, 1.3) * 1.08
-        green_curve = self._s_curve(base_curve, 1.25) * 0.95
-        blue_curve = self._s_curve(base_curve, 1.3) * 1.1
+        red_curve = self._base_s_curve(1.3) * 1.08
+        green_curve = self._base_s_curve(1.25) * 0.95
+        blue_curve = self._base_s_curve(1.3) * 1.1
         
         return {
             'red': np.clip(red_curve, 0, 1),
@@ -67,11 +68,8 @@ class SimpleLUTApplier:
     
     def create_acros_lut(self):
         """ACROS - B&W film simulation"""
-        curve_size = 256
-        base_curve = np.linspace(0, 1, curve_size)
-        
         # Film-like B&W curve with warm tint
-        base_curve = self._s_curve(base_curve, 1.1)
+        base_curve = self._base_s_curve(1.1)
         
         red_curve = base_curve * 1.02    # Warm B&W
         green_curve = base_curve
@@ -124,6 +122,16 @@ class SimpleLUTApplier:
                        np.power(values * 2, strength) / 2,
                        1 - np.power((1 - values) * 2, strength) / 2)
     
+    def _base_s_curve(self, strength):
+        """S-curve of linspace(0, 1, 256), computed once per strength (read-only)"""
+        key = round(strength, 3)
+        curve = self._s_curve_cache.get(key)
+        if curve is None:
+            curve = self._s_curve(np.linspace(0, 1, 256), key)
+            curve.setflags(write=False)
+            self._s_curve_cache[key] = curve
+        return curve
+    
     def load_custom_lut(self, lut_file):
         """Load LUT from .npz file"""
         try:
@@ -146,19 +154,17 @@ class SimpleLUTApplier:
         if image.dtype != np.uint8:
             image = (np.clip(image, 0, 1) * 255).astype(np.uint8)
         
-        # Split channels (OpenCV uses BGR)
-        b, g, r = cv2.split(image)
-        
-        # Apply LUT curves
-        r_lut = (lut_dict['red'] * 255).astype(np.uint8)
-        g_lut = (lut_dict['green'] * 255).astype(np.uint8)
-        b_lut = (lut_dict['blue'] * 255).astype(np.uint8)
-        
-        r_new = r_lut[r]
-        g_new = g_lut[g]
-        b_new = b_lut[b]
-        
-        return cv2.merge([b_new, g_new, r_new])
+        return cv2.LUT(image, self._get_bgr_table(lut_dict))
+
+    def _get_bgr_table(self, lut_dict):
+        """Cached (1, 256, 3) uint8 table in OpenCV's BGR order"""
+        curves = [np.asarray(lut_dict[c]) for c in ('blue', 'green', 'red')]
+        key = (lut_dict['name'],) + tuple(c.tobytes() for c in curves)
+        table = self._lut_cache.get(key)
+        if table is None:
+            table = (np.stack(curves, axis=-1) * 255).astype(np.uint8).reshape(1, 256, 3)
+            self._lut_cache[key] = table
+        return table
     
     def process_dng_with_dcraw(self, dng_path):
         """Process DNG with local dcraw"""
@@ -225,16 +231,14 @@ class SimpleLUTApplier:
         
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         noise = np.random.normal(0, intensity * 255, gray.shape).astype(np.float32)
-        
+
         # Apply grain more to midtones
         mask = np.where((gray > 50) & (gray < 200), 1.0, 0.3)
         noise *= mask
-        
-        result = image.astype(np.float32)
-        for i in range(3):
-            result[:, :, i] += noise
-        
-        return np.clip(result, 0, 255).astype(np.uint8)
+
+        # Same grain on every channel; cv2.add saturates to 0..255 in one pass
+        noise = noise.astype(np.int16)
+        return cv2.add(image, cv2.merge([noise, noise, noise]), dtype=cv2.CV_8U)
     
     def process_image(self, input_path, output_path, lut_name, add_grain=False, custom_lut=None):
         """Process single image with LUT"""
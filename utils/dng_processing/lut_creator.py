@@ -26,6 +26,8 @@ class UniversalLUTTuner:
         self.current_texture_tag = "preview_texture"
         self.last_update_time = 0
         self.update_delay = 0.5  # 50ms minimum between updates
+        self.proxy_image = None
+        self.proxy_size = 512  # Longest edge of the preview rendered while a slider is dragged
 
         
         # Comprehensive parameters for any film look
@@ -193,6 +195,11 @@ class UniversalLUTTuner:
             
             print(f"Resized image shape: {self.original_image.shape}")
             
+            # Small proxy for slider drags; the full preview is re-rendered on release
+            proxy_scale = min(1.0, self.proxy_size / max(new_width, new_height))
+            self.proxy_image = cv2.resize(self.original_image, (0, 0), fx=proxy_scale, fy=proxy_scale,
+                                          interpolation=cv2.INTER_AREA)
+            
             # Update the preview
             success = self.update_preview()
             if not success:
@@ -207,7 +214,7 @@ class UniversalLUTTuner:
             traceback.print_exc()
             return False
     
-    def create_or_update_texture(self, rgba_array, width, height):
+    def create_or_update_texture(self, rgba_array, width, height, display_width=None, display_height=None):
         """Create or update texture with proper error handling"""
         try:
             flat_image = rgba_array.flatten().astype(np.float32) / 255.0
@@ -229,7 +236,9 @@ class UniversalLUTTuner:
                 dpg.delete_item("preview_image")
             
             # Create new image widget in the correct parent
-            dpg.add_image(new_texture_tag, tag="preview_image", parent="preview_group")
+            # Proxy textures are stretched to the full preview size so the layout doesn't jump
+            dpg.add_image(new_texture_tag, tag="preview_image", parent="preview_group",
+                          width=display_width or width, height=display_height or height)
             
             # Store current texture tag
             self.current_texture_tag = new_texture_tag
@@ -337,26 +346,25 @@ class UniversalLUTTuner:
             return image
         
         try:
-            # Convert to HSV for saturation adjustment
-            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV).astype(np.float32)
-            h, s, v = cv2.split(hsv)
-            
-            # Saturation adjustment (affects all colors equally)
-            if saturation != 0:
-                s = s * (1 + saturation)
+            # Scale each pixel's color around its luma, staying in BGR (no HSV round-trip)
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
-            # Vibrance adjustment (protects skin tones, affects low-saturation areas more)
-            if vibrance != 0:
-                # Vibrance affects less saturated colors more
-                vibrance_mask = 1 - (s / 255.0)  # Inverse of current saturation
-                s = s + vibrance * 50 * vibrance_mask
+            if vibrance == 0:
+                # Uniform saturation is a single saturating blend of the image and its gray
+                gray = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+                return cv2.addWeighted(image, 1 + saturation, gray, -saturation, 0)
             
-            s = np.clip(s, 0, 255)
-            
-            # Merge and convert back
-            hsv_merged = cv2.merge([h, s, v])
-            result = cv2.cvtColor(hsv_merged.astype(np.uint8), cv2.COLOR_HSV2BGR)
-            return result
+            # Vibrance affects less saturated colors more; min/max is 1 - HSV saturation
+            b, g, r = cv2.split(image)
+            max_c = cv2.max(cv2.max(b, g), r)
+            min_c = cv2.min(cv2.min(b, g), r)
+            desat = cv2.divide(min_c, cv2.max(max_c, 1), dtype=cv2.CV_32F)
+            scale = (1 + saturation) * (1 + vibrance * desat)
+            
+            gray = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+            chroma = cv2.subtract(image, gray, dtype=cv2.CV_32F)
+            chroma = cv2.multiply(chroma, cv2.merge([scale, scale, scale]))
+            return cv2.add(chroma, gray, dtype=cv2.CV_8U)
         except Exception as e:
             print(f"Error in saturation/vibrance adjustment: {e}")
             return image
@@ -476,8 +484,8 @@ class UniversalLUTTuner:
             print(f"Error applying LUT: {e}")
             return image
     
-    def update_preview(self):
-        """Update the preview image with current parameters"""
+    def update_preview(self, use_proxy=False):
+        """Update the preview image with current parameters (from the small proxy while dragging)"""
         if self.original_image is None:
             print("No original image to process")
             return False
@@ -486,7 +494,8 @@ class UniversalLUTTuner:
             print("Updating preview...")
             
             # Start with original image
-            processed = self.original_image.copy()
+            source = self.proxy_image if use_proxy and self.proxy_image is not None else self.original_image
+            processed = source.copy()
             
             # Apply color temperature and tint
             processed = self.apply_color_temperature(processed, 
@@ -502,7 +511,8 @@ class UniversalLUTTuner:
                                                      self.params['saturation'], 
                                                      self.params['vibrance'])
             
-            self.processed_image = processed
+            if source is self.original_image:
+                self.processed_image = processed  # Only full previews are exported
             
             # Convert for DPG display (BGR to RGB, then add alpha channel)
             rgb_image = cv2.cvtColor(processed, cv2.COLOR_BGR2RGB)
@@ -514,7 +524,8 @@ class UniversalLUTTuner:
             rgba_image[:, :, 3] = 255  # Alpha channel (fully opaque)
             
             # Update or create texture
-            success = self.create_or_update_texture(rgba_image, width, height)
+            full_height, full_width = self.original_image.shape[:2]
+            success = self.create_or_update_texture(rgba_image, width, height, full_width, full_height)
             if not success:
                 print("Failed to update texture")
                 return False
@@ -539,7 +550,7 @@ class UniversalLUTTuner:
             
             # Throttle updates during dragging
             if current_time - self.last_update_time > self.update_delay:
-                self.update_preview()
+                self.update_preview(use_proxy=True)
                 self.last_update_time = current_time
             else:
                 # Schedule a delayed update
@@ -548,7 +559,7 @@ class UniversalLUTTuner:
                     def delayed_update():
                         time.sleep(0.1)  # Wait a bit
                         if hasattr(self, 'pending_update') and self.pending_update:
-                            self.update_preview()
+                            self.update_preview(use_proxy=True)
                             self.pending_update = False
                     
                     import threading
@@ -557,6 +568,11 @@ class UniversalLUTTuner:
         except Exception as e:
             print(f"Error in parameter callback: {e}")
     
+    def slider_released_callback(self, sender, app_data, user_data):
+        """Re-render the full-size preview once a slider drag ends"""
+        self.pending_update = False
+        self.update_preview()
+    
     def load_file_callback(self, sender, app_data, user_data):
         """Callback for file dialog"""
         try:
@@ -798,6 +814,13 @@ def main():
             dpg.add_separator()
             dpg.add_text("Ready - Load an image to start creating your LUT", tag="status_text")
         
+        # Drags render the proxy; releasing any slider renders the full preview
+        with dpg.item_handler_registry(tag="slider_release_handler"):
+            dpg.add_item_deactivated_after_edit_handler(callback=tuner.slider_released_callback)
+        for param in tuner.params:
+            if dpg.does_item_exist(f"{param}_slider"):
+                dpg.bind_item_handler_registry(f"{param}_slider", "slider_release_handler")
+        
         dpg.set_primary_window("main_window", True)
         dpg.setup_dearpygui()
         dpg.show_viewport()